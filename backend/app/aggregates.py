@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import text
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Plan, Chunk, ChunkStatus
+
+# Per-plan aggregates stored on the plan row (see PlanAggregates).
+# Chunk writes apply a before/after delta to the plan in the same transaction,
+# so reading progress never needs the chunk table. The single-chunk fast
+# paths instead recompute the whole row with recompute_plan: one UPDATE whose
+# aggregate subquery is a range scan of the plan's chunks.
+
+STATUS_COUNT_FIELDS = {
+    ChunkStatus.TODO: "todo_count",
+    ChunkStatus.IN_PROGRESS: "in_progress_count",
+    ChunkStatus.DONE: "done_count",
+    ChunkStatus.SKIPPED: "skipped_count",
+    ChunkStatus.DEFERRED: "deferred_count",
+}
+
+class ChunkState(NamedTuple):
+    status: ChunkStatus
+    estimated_hours: float
+    deadline: Optional[datetime]
+
+    @classmethod
+    def of(cls, chunk: Chunk) -> "ChunkState":
+        return cls(ChunkStatus(chunk.status), float(chunk.estimated_hours or 0), naive_deadline(chunk.deadline))
+
+def naive_deadline(deadline: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands deadlines back naive, but request bodies may carry "Z" or an
+    # offset; drop it (as the column does on write) so the two compare.
+    return deadline.replace(tzinfo=None) if deadline else deadline
+
+def _add(plan: Plan, state: ChunkState, sign: int):
+    plan.chunk_count += sign
+    field = STATUS_COUNT_FIELDS[state.status]
+    setattr(plan, field, getattr(plan, field) + sign)
+    plan.total_hours += sign * state.estimated_hours
+    if state.status == ChunkStatus.DONE:
+        plan.completed_hours += sign * state.estimated_hours
+
+def apply_chunk_change(plan: Plan, before: Optional[ChunkState], after: Optional[ChunkState]) -> bool:
+    """
+    Applies one chunk insert (before=None), update or delete (after=None) to the
+    plan's aggregates. Returns True when the deadline can't be derived from the
+    delta (the chunk holding the latest deadline moved earlier or went away) and
+    must be re-read with refresh_plan_deadline.
+    """
+    if before:
+        _add(plan, before, -1)
+    if after:
+        _add(plan, after, +1)
+
+    if after and after.deadline and (plan.deadline is None or after.deadline > plan.deadline):
+        plan.deadline = after.deadline
+        return False
+    if before and before.deadline and before.deadline == plan.deadline:
+        return after is None or after.deadline != before.deadline
+    return False
+
+async def refresh_plan_deadline(session: AsyncSession, plan: Plan):
+    # Served from ix_chunk_plan_id_deadline without touching chunk rows
+    plan.deadline = (await session.exec(
+        select(func.max(Chunk.deadline)).where(Chunk.plan_id == plan.id)
+    )).one()
+
+def bump_plan_version(plan: Plan):
+    # Called once per write request so ETags change with any plan or chunk edit
+    plan.version += 1
+
+_plan_table = Plan.__table__
+_RECOMPUTE_PLAN = text(f"""
+    UPDATE "plan" SET
+        (chunk_count, todo_count, in_progress_count, done_count, skipped_count, deferred_count,
+         total_hours, completed_hours, deadline) = (
+            SELECT count(*),
+                   coalesce(sum(status = 'TODO'), 0),
+                   coalesce(sum(status = 'IN_PROGRESS'), 0),
+                   coalesce(sum(status = 'DONE'), 0),
+                   coalesce(sum(status = 'SKIPPED'), 0),
+                   coalesce(sum(status = 'DEFERRED'), 0),
+                   total(estimated_hours),
+                   total(CASE WHEN status = 'DONE' THEN estimated_hours END),
+                   max(deadline)
+            FROM chunk WHERE chunk.plan_id = :plan_id
+        ),
+        version = version + 1
+    WHERE id = :plan_id
+    RETURNING {", ".join(f'"{column.name}"' for column in _plan_table.c)}
+""").columns(*_plan_table.c)
+
+async def recompute_plan(session: AsyncSession, plan_id: str) -> Optional[Plan]:
+    """
+    Rewrites the plan's aggregates and deadline from its chunks and bumps its
+    version, in one statement. Returns the updated plan (detached), or None
+    if there is no such plan.
+    """
+    row = (await session.exec(_RECOMPUTE_PLAN, params={"plan_id": plan_id})).first()
+    return Plan(**row._mapping) if row else None
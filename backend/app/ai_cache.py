@@ -0,0 +1,83 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Callable, Dict, Optional, Sequence
+from sqlalchemy import text
+from app.database import async_engine, async_read_engine
+
+# Persistent cache for LLM answers, keyed by content.
+# The key is a hash of the normalized prompt and the model chain that would
+# answer it, so the same title/description/deadline gets the same answer
+# without another 2-10 s Gemini round trip, across users and restarts.
+# Only answers that parsed are stored. Entries expire after a TTL, and the
+# oldest are evicted once the table grows past max_entries.
+
+_WHITESPACE = re.compile(r"\s+")
+
+def prompt_key(prompt: str, models: Sequence[str]) -> str:
+    normalized = _WHITESPACE.sub(" ", prompt).strip()
+    payload = json.dumps([list(models), normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class PromptCache:
+    def __init__(self, write_engine, read_engine, ttl: float, max_entries: int, clock: Callable[[], float] = time.time):
+        self.write_engine = write_engine
+        self.read_engine = read_engine
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self.read_engine.connect() as conn:
+            row = (await conn.execute(
+                text("SELECT response FROM ai_cache WHERE key = :key AND expires_at > :now"),
+                {"key": key, "now": self.clock()},
+            )).first()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    async def set(self, key: str, response: str):
+        await self.set_many({key: response})
+
+    async def set_many(self, responses: Dict[str, str]):
+        if not responses:
+            return
+        now = self.clock()
+        async with self.write_engine.begin() as conn:
+            await conn.execute(
+                text("INSERT OR REPLACE INTO ai_cache (key, response, created_at, expires_at) VALUES (:key, :response, :now, :expires_at)"),
+                [{"key": key, "response": response, "now": now, "expires_at": now + self.ttl} for key, response in responses.items()],
+            )
+            await conn.execute(text("DELETE FROM ai_cache WHERE expires_at <= :now"), {"now": now})
+            # Size bound: keep the newest max_entries rows
+            await conn.execute(
+                text("DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache ORDER BY created_at DESC LIMIT -1 OFFSET :keep)"),
+                {"keep": self.max_entries},
+            )
+        self.writes += len(responses)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+        }
+
+prompt_cache = PromptCache(
+    async_engine,
+    async_read_engine,
+    ttl=float(os.getenv("PLANOUT_AI_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("PLANOUT_AI_CACHE_MAX_ENTRIES", "5000")),
+)
@@ -0,0 +1,98 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Hashable, NamedTuple, Optional, Tuple
+
+# Bounded LRU + TTL cache for serialized read payloads.
+# Write routes invalidate exactly the entries they affect, so the TTL is only
+# a safety net for writes this process can't see (other workers, scripts).
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped by every invalidation. Readers capture it before going to the
+        # database and pass it to set(), so a payload read before a concurrent
+        # write can't be cached after that write invalidated it.
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, epoch: Optional[int] = None):
+        if epoch is not None and epoch != self.epoch:
+            return
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self.epoch += 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]):
+        self.epoch += 1
+        for key in [k for k, (_, value) in self._entries.items() if predicate(k, value)]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        self.epoch += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+class CachedPage(NamedTuple):
+    etag: str
+    body: bytes
+    next_cursor: Optional[str]
+    # Every plan the page query returned, including the extra probe row
+    plan_ids: FrozenSet[str]
+    # (created_at, id) key range the page covers; None means unbounded
+    after: Optional[Tuple[datetime, str]]
+    until: Optional[Tuple[datetime, str]]
+
+CACHE_TTL = float(os.getenv("PLANOUT_CACHE_TTL", "60"))
+
+# GET /plans/{id}: plan_id -> (etag, body)
+plan_cache = TTLCache(maxsize=int(os.getenv("PLANOUT_PLAN_CACHE_SIZE", "1024")), ttl=CACHE_TTL)
+# GET /plans: (include, limit, cursor) -> CachedPage
+plan_list_cache = TTLCache(maxsize=int(os.getenv("PLANOUT_PLAN_LIST_CACHE_SIZE", "64")), ttl=CACHE_TTL)
+# GET /occurrences: (start, end, plan_id) -> body
+occurrence_cache = TTLCache(maxsize=int(os.getenv("PLANOUT_OCCURRENCE_CACHE_SIZE", "128")), ttl=CACHE_TTL)
@@ -0,0 +1,110 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Chunk, ChunkEvent, ChunkEventKind, ChunkStatus, Frequency
+
+# Skip / defer / done events per chunk and day.
+# Events are appended to chunk_event and never rewritten. Chunk.history is a
+# materialized view of them for reads ({"skipped": [days], "deferred":
+# {day: target}, "done": [days]}): each append folds one event into it, so a
+# write is one small insert plus the chunk row, whatever the chunk's age.
+
+VIEW_KEYS = ("skipped", "deferred", "done")
+
+# Status a chunk takes when the event is appended through the API
+EVENT_STATUS = {
+    ChunkEventKind.SKIP: ChunkStatus.SKIPPED,
+    ChunkEventKind.UNSKIP: ChunkStatus.TODO,
+    ChunkEventKind.DONE: ChunkStatus.DONE,
+}
+
+def _add(days: Optional[List[str]], day: str) -> List[str]:
+    days = list(days or ())
+    if day not in days:
+        days.append(day)
+    return days
+
+def apply_event(history: Optional[Dict[str, Any]], kind: str, day: str, target: Optional[str] = None) -> Dict[str, Any]:
+    """The history view with one more event folded in; a new dict, so the JSON column sees the change."""
+    view = dict(history or {})
+    if kind == ChunkEventKind.SKIP:
+        view["skipped"] = _add(view.get("skipped"), day)
+    elif kind == ChunkEventKind.UNSKIP:
+        view["skipped"] = [d for d in view.get("skipped") or () if d != day]
+    elif kind == ChunkEventKind.DONE:
+        view["done"] = _add(view.get("done"), day)
+    elif kind == ChunkEventKind.UNDONE:
+        view["done"] = [d for d in view.get("done") or () if d != day]
+    elif kind == ChunkEventKind.DEFER:
+        deferred = dict(view.get("deferred") or {})
+        if target:
+            deferred[day] = target
+        else:
+            deferred.pop(day, None)
+        view["deferred"] = deferred
+    # Keep the view compact: no empty lists or maps
+    return {key: value for key, value in view.items() if value or key not in VIEW_KEYS}
+
+def materialize(events: Iterable[Tuple[str, str, Optional[str]]]) -> Dict[str, Any]:
+    """History view for (kind, day, target) events in append order."""
+    view: Dict[str, Any] = {}
+    for kind, day, target in events:
+        view = apply_event(view, kind, day, target)
+    return view
+
+def history_events(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Events that turn one history view into another, for clients that still
+    PATCH the whole dict.
+    """
+    old, new = old or {}, new or {}
+    events = []
+    for key, add, remove in (("skipped", ChunkEventKind.SKIP, ChunkEventKind.UNSKIP), ("done", ChunkEventKind.DONE, ChunkEventKind.UNDONE)):
+        before, after = old.get(key) or [], new.get(key) or []
+        events += [(remove.value, day, None) for day in before if day not in after]
+        events += [(add.value, day, None) for day in after if day not in before]
+    before, after = old.get("deferred") or {}, new.get("deferred") or {}
+    events += [(ChunkEventKind.DEFER.value, day, None) for day in before if day not in after]
+    events += [(ChunkEventKind.DEFER.value, day, target) for day, target in after.items() if before.get(day) != target]
+    return [event for event in events if isinstance(event[1], str)]
+
+def record_events(session: AsyncSession, chunk: Chunk, events: Iterable[Tuple[str, str, Optional[str]]]):
+    """Appends events for chunk and folds them into chunk.history; the caller commits."""
+    history = chunk.history
+    for kind, day, target in events:
+        session.add(ChunkEvent(chunk_id=chunk.id, kind=kind, day=day, target=target))
+        history = apply_event(history, kind, day, target)
+    chunk.history = history
+
+def replace_history(session: AsyncSession, chunk: Chunk, history: Dict[str, Any]):
+    """A whole history dict from a PATCH, recorded as the events it implies."""
+    record_events(session, chunk, history_events(chunk.history, history))
+    # Keys outside the view are kept as sent
+    extra = {key: value for key, value in history.items() if key not in VIEW_KEYS}
+    chunk.history = {key: value for key, value in (chunk.history or {}).items() if key in VIEW_KEYS} | extra
+
+def record_initial_history(session: AsyncSession, chunk: Chunk):
+    """Events for the history a new chunk was created with."""
+    if chunk.history:
+        record_events(session, chunk, history_events({}, chunk.history))
+
+def shift_occurrences(moment: datetime, frequency: str, count: int) -> datetime:
+    """moment moved by count occurrences of a recurring chunk (skipping one adds one at the end)."""
+    frequency = getattr(frequency, "value", frequency)
+    if frequency == Frequency.WEEKLY.value:
+        return moment + timedelta(days=7 * count)
+    if frequency == Frequency.MONTHLY.value:
+        month = moment.month - 1 + count
+        year, month = moment.year + month // 12, month % 12 + 1
+        return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+    if frequency == Frequency.DAILY.value:
+        return moment + timedelta(days=count)
+    return moment
+
+async def chunk_events(session: AsyncSession, chunk_id: str) -> List[ChunkEvent]:
+    # In append order, from ix_chunk_event_chunk_id
+    return (await session.exec(
+        select(ChunkEvent).where(ChunkEvent.chunk_id == chunk_id).order_by(ChunkEvent.id)
+    )).all()
@@ -1,10 +1,80 @@
+import os
+from dataclasses import dataclass
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 sqlite_file_name = "planout_v2.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
+async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    SQLite tuning applied to every connection when it is opened.
+    Defaults are the production profile; each value can be overridden with a
+    PLANOUT_SQLITE_* environment variable.
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64000  # negative = KiB, so ~64 MB
+    busy_timeout: int = 5000  # ms
+    read_pool_size: int = 4
+
+    @classmethod
+    def from_env(cls) -> "StorageProfile":
+        defaults = cls()
+        return cls(
+            journal_mode=os.getenv("PLANOUT_SQLITE_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=os.getenv("PLANOUT_SQLITE_SYNCHRONOUS", defaults.synchronous),
+            mmap_size=int(os.getenv("PLANOUT_SQLITE_MMAP_SIZE", defaults.mmap_size)),
+            cache_size=int(os.getenv("PLANOUT_SQLITE_CACHE_SIZE", defaults.cache_size)),
+            busy_timeout=int(os.getenv("PLANOUT_SQLITE_BUSY_TIMEOUT", defaults.busy_timeout)),
+            read_pool_size=int(os.getenv("PLANOUT_SQLITE_READ_POOL_SIZE", defaults.read_pool_size)),
+        )
+
+    def pragmas(self, read_only: bool = False) -> list:
+        statements = [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA cache_size={self.cache_size}",
+            f"PRAGMA busy_timeout={self.busy_timeout}",
+        ]
+        if read_only:
+            statements.append("PRAGMA query_only=ON")
+        return statements
+
+storage_profile = StorageProfile.from_env()
+
+def apply_storage_profile(sync_engine, profile: StorageProfile, read_only: bool = False):
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in profile.pragmas(read_only=read_only):
+            cursor.execute(statement)
+        cursor.close()
 
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, connect_args=connect_args)
+apply_storage_profile(engine, storage_profile)
+
+# Async engines for the API routes. aiosqlite runs each connection on its own
+# thread, so route handlers await queries instead of occupying a threadpool slot.
+# SQLite allows one writer at a time, so writes share a single connection and
+# queue for it in the pool rather than fighting over the file lock. With WAL,
+# GET routes read from a separate pool that never blocks on that writer.
+async_engine = create_async_engine(async_sqlite_url, pool_size=1, max_overflow=0)
+apply_storage_profile(async_engine.sync_engine, storage_profile)
+
+async_read_engine = create_async_engine(async_sqlite_url, pool_size=storage_profile.read_pool_size, max_overflow=0)
+apply_storage_profile(async_read_engine.sync_engine, storage_profile, read_only=True)
+
+# Objects stay usable after commit; lazy refreshes would need IO outside an await.
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+async_read_session_maker = async_sessionmaker(async_read_engine, class_=AsyncSession, expire_on_commit=False)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -12,3 +82,11 @@ def create_db_and_tables():
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+async def get_read_session():
+    async with async_read_session_maker() as session:
+        yield session
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+
+# Vectorized deadline engine.
+# A task's deadline is its start plus (sessions needed × days between
+# sessions), where sessions needed = total hours / session length. Suggestion
+# post-processing, the backfill script and bulk recomputes all go through
+# compute_deadlines, which does the math for whole arrays of chunks at once.
+
+# Days between sessions per frequency; "Once" sessions run back to back
+FREQUENCY_DAYS = {"Once": 1, "Daily": 1, "Weekly": 7, "Monthly": 30}
+FREQUENCY_CODES = {name.lower(): code for code, name in enumerate(FREQUENCY_DAYS)}
+_DAYS_BY_CODE = np.array(list(FREQUENCY_DAYS.values()), dtype=np.float64)
+
+# Offsets past this are treated as bad input rather than overflowing datetime64
+MAX_OFFSET_DAYS = 365 * 1000
+
+def frequency_codes(frequencies: Sequence[Optional[str]]) -> np.ndarray:
+    """Frequency names (any case) to codes; unknown or missing count as "Once"."""
+    lookup = FREQUENCY_CODES.get
+    return np.fromiter(
+        (lookup(f.lower(), 0) if f else 0 for f in frequencies),
+        dtype=np.int8,
+        count=len(frequencies),
+    )
+
+def offset_days(estimated_hours: np.ndarray, duration_minutes: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Whole days from start to deadline, plus a mask of rows that have one
+    (positive hours and session length, finite and in range).
+    """
+    hours = np.asarray(estimated_hours, dtype=np.float64)
+    minutes = np.asarray(duration_minutes, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Same operation order as the scalar formula, so results match it exactly
+        total_days = hours / (minutes / 60.0) * _DAYS_BY_CODE[codes]
+    valid = (hours > 0) & (minutes > 0) & np.isfinite(total_days) & (total_days <= MAX_OFFSET_DAYS)
+    days = np.where(valid, np.trunc(np.where(valid, total_days, 0)), 0).astype(np.int64)
+    return days, valid
+
+def compute_deadlines(
+    estimated_hours: Sequence[float],
+    duration_minutes: Sequence[float],
+    frequencies: Union[Sequence[Optional[str]], np.ndarray],
+    starts: Union[datetime, np.datetime64, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Deadlines (datetime64[us]) for arrays of chunks and the mask of rows that
+    got one. frequencies may be names or codes from frequency_codes; starts a
+    single start for all rows or one per row.
+    """
+    codes = frequencies if isinstance(frequencies, np.ndarray) and frequencies.dtype.kind in "iu" else frequency_codes(frequencies)
+    days, valid = offset_days(estimated_hours, duration_minutes, codes)
+    start = np.asarray(starts, dtype="datetime64[us]")
+    return start + days.astype("timedelta64[D]"), valid
+
+def deadline_for(estimated_hours: float, duration_minutes: float, frequency: Optional[str], start: datetime) -> Optional[datetime]:
+    """Single-chunk convenience wrapper; None when the inputs give no deadline."""
+    deadlines, valid = compute_deadlines([estimated_hours], [duration_minutes], [frequency], start)
+    return deadlines[0].astype(datetime) if valid[0] else None
@@ -0,0 +1,65 @@
+import asyncio
+from collections import deque
+from itertools import count
+from typing import Any, Dict, Optional, Set
+from app.serializers import dumps
+
+# In-process plan/chunk change feed for GET /events (server-sent events).
+# Write routes publish compact deltas after they commit; each subscriber gets
+# its own bounded queue so one slow client can't hold up the others. Events
+# are numbered, and a short replay buffer lets a reconnecting EventSource
+# resume from Last-Event-ID instead of refetching everything.
+
+RESYNC = "resync"  # client must refetch: it fell behind or asked for an expired id
+
+class EventBroker:
+    def __init__(self, queue_size: int = 256, replay_size: int = 1024):
+        self.queue_size = queue_size
+        self._ids = count(1)
+        self._replay = deque(maxlen=replay_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, plan_id: str, **data: Any) -> Dict[str, Any]:
+        event = {"id": next(self._ids), "type": event_type, "plan_id": plan_id, **data}
+        self._replay.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind to deliver deltas reliably; tell it to refetch
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait({"id": event["id"], "type": RESYNC})
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        latest = self._replay[-1]["id"] if self._replay else 0
+        if last_event_id is not None and last_event_id != latest:
+            oldest = self._replay[0]["id"] if self._replay else latest + 1
+            missed = [e for e in self._replay if e["id"] > last_event_id]
+            # Ids from before a restart, or older than the replay buffer
+            unknown = last_event_id > latest or last_event_id < oldest - 1
+            if unknown or len(missed) >= self.queue_size:
+                # Can't replay the gap: refetch once, then follow live deltas
+                queue.put_nowait({"id": latest, "type": RESYNC})
+            else:
+                for event in missed:
+                    queue.put_nowait(event)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def is_subscribed(self, queue: asyncio.Queue) -> bool:
+        return queue in self._subscribers
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event).decode()}\n\n"
+
+broker = EventBroker()
@@ -1,62 +1,396 @@
 import os
 import json
+import time
+import asyncio
+from collections import OrderedDict
 import google.generativeai as genai
-from typing import List, Dict, Optional
+import google.ai.generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
+from typing import Any, AsyncIterator, Callable, List, Dict, Optional
+from datetime import datetime
 from dotenv import load_dotenv
+from app.ai_cache import prompt_cache, prompt_key
+from app.llm_health import model_health, hedge_stats, key_id
+from app.json_stream import JsonArrayStream
+from app.deadlines import compute_deadlines
+from app.llm_output import (
+    SuggestedTask, ChunkDetails, NumberedChunkDetails, TASKS_SCHEMA, DETAILS_SCHEMA, NUMBERED_DETAILS_SCHEMA,
+    parse_items, parse_object, validate_item,
+)
 
 # Load env from .env file explicitly if needed
 load_dotenv()
 
 DEFAULT_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if DEFAULT_API_KEY:
-    genai.configure(api_key=DEFAULT_API_KEY)
-
-# Models to try in order of preference (Free/Fast -> Paid/Powerful)
 # Models to try in order of preference (Free/Fast -> Paid/Powerful)
 MODELS = ["gemini-2.5-flash", "gemini-2.0-flash", "gemini-2.0-flash-lite", "gemini-2.0-flash-001", "gemini-flash-latest"]
 
 def is_configured() -> bool:
     return bool(DEFAULT_API_KEY)
 
-def _generate_with_retry(prompt: str, api_key: Optional[str] = None) -> str:
-    # If a specific key is provided for this request, configure it
-    # Note: genai.configure is global. In high concurrency async apps this might be race-condition prone.
-    # Ideally we'd pass api_key to GenerativeModel constructor if supported, or use client instance.
-    # The current google-generativeai lib is a bit global-state heavy, but for this prototype it's likely fine.
-    # Alternatively, we can instantiate a client if the library supports it (v0.3+ does).
-    
-    if api_key:
-        print(f"DEBUG: Using provided API Key (Length: {len(api_key)})")
-        genai.configure(api_key=api_key)
-    elif DEFAULT_API_KEY:
-         print(f"DEBUG: Using DEFAULT API Key from Env (Length: {len(DEFAULT_API_KEY)})")
-         genai.configure(api_key=DEFAULT_API_KEY)
-    else:
-         print("DEBUG: No API Key found in args or env.")
-    
-    # If no key at all
-    if not api_key and not DEFAULT_API_KEY:
+def set_default_api_key(api_key: Optional[str]):
+    global DEFAULT_API_KEY
+    DEFAULT_API_KEY = api_key or None
+
+def _make_async_client(api_key: str):
+    return glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+
+class ClientPool:
+    """
+    One async Gemini client per API key, bounded LRU.
+    genai.configure() is process-global, so configuring it per request lets
+    concurrent BYOK requests run with each other's keys. Each key gets its own
+    client instead. gRPC aio channels belong to the event loop that created
+    them, so a client is rebuilt when it is used from a different loop.
+    """
+    def __init__(self, maxsize: int = 32, factory: Callable[[str], Any] = _make_async_client):
+        self.maxsize = maxsize
+        self.factory = factory
+        self._clients: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, api_key: str):
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(api_key)
+        if entry is not None and entry[0] is loop:
+            self._clients.move_to_end(api_key)
+            return entry[1]
+        client = self.factory(api_key)
+        self._clients[api_key] = (loop, client)
+        self._clients.move_to_end(api_key)
+        while len(self._clients) > self.maxsize:
+            _, (old_loop, old_client) = self._clients.popitem(last=False)
+            if old_loop is loop:
+                _close_client(old_client)
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+def _close_client(client):
+    transport = getattr(client, "transport", None)
+    if transport is not None and hasattr(transport, "close"):
+        try:
+            asyncio.get_running_loop().create_task(transport.close())
+        except Exception as e:
+            print(f"Closing Gemini client failed: {e}")
+
+client_pool = ClientPool(maxsize=int(os.getenv("PLANOUT_GEMINI_CLIENT_POOL_SIZE", "32")))
+
+# Hedged requests (opt-in): race a backup model when the primary is slower
+# than its usual HEDGE_PERCENTILE latency.
+HEDGE = os.getenv("PLANOUT_LLM_HEDGE", "").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("PLANOUT_LLM_HEDGE_PERCENTILE", "0.9"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("PLANOUT_LLM_HEDGE_DEFAULT_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.getenv("PLANOUT_LLM_HEDGE_MIN_DELAY", "0.25"))
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many AI requests, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    rate requests/second with bursts of up to burst. Callers over the limit
+    reserve a future token and wait their turn (FIFO); when the wait would
+    exceed max_wait they are rejected at once instead of piling up.
+    """
+    def __init__(self, rate: float, burst: int, max_wait: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.allowed = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def reserve(self) -> float:
+        """Takes a token; returns how long to wait for it (raises RateLimited)."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimited(wait)
+        self.tokens -= 1
+        self.allowed += 1
+        if wait:
+            self.queued += 1
+        return wait
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.tokens += 1  # hand the reservation back
+                raise
+
+class RateLimiter:
+    """One TokenBucket per API key (default and BYOK keys alike), bounded LRU."""
+    def __init__(self, rate: float, burst: int, max_wait: float, max_keys: int = 256):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def bucket(self, api_key: str) -> TokenBucket:
+        scope = key_id(api_key)
+        bucket = self._buckets.get(scope)
+        if bucket is None:
+            bucket = self._buckets[scope] = TokenBucket(self.rate, self.burst, self.max_wait)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(scope)
+        return bucket
+
+    async def acquire(self, api_key: str):
+        await self.bucket(api_key).acquire()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            scope: {"allowed": b.allowed, "queued": b.queued, "rejected": b.rejected}
+            for scope, b in self._buckets.items()
+        }
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight task (double
+    clicks, several tabs). Each caller awaits it shielded, so one caller
+    going away doesn't cancel the call for the others.
+    """
+    def __init__(self):
+        self._calls: Dict[Any, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn: Callable[[], Any]):
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key, None) if self._calls.get(key) is done else None)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+rate_limiter = RateLimiter(
+    rate=float(os.getenv("PLANOUT_GEMINI_RATE", "1.0")),
+    burst=int(os.getenv("PLANOUT_GEMINI_BURST", "10")),
+    max_wait=float(os.getenv("PLANOUT_GEMINI_MAX_QUEUE_WAIT", "5.0")),
+)
+in_flight = SingleFlight()
+
+class ModelUnavailable(Exception):
+    """The model's circuit breaker is open."""
+
+def _use_client(model, client):
+    # GenerativeModel has no public way to take a client: it uses the one
+    # genai.configure() made, which is process-wide and would answer BYOK
+    # requests with whichever key was configured last. Overriding the private
+    # _async_client pins the model to this key's client; if an SDK upgrade
+    # drops the attribute, fail the call rather than fall back to the global
+    # client and its key.
+    if not hasattr(model, "_async_client"):
+        raise RuntimeError("google-generativeai no longer exposes GenerativeModel._async_client; per-key clients need updating")
+    model._async_client = client
+
+def _json_config(schema: Optional[dict]):
+    # Constrain the model to emit JSON of this shape (see app/llm_output.py)
+    if schema is None:
+        return None
+    return genai.GenerationConfig(response_mime_type="application/json", response_schema=schema)
+
+async def _call_model(key: str, client, model_name: str, prompt: str, validate: Optional[Callable[[str], Any]] = None, schema: Optional[dict] = None) -> str:
+    breaker = model_health.breaker(key, model_name)
+    if not breaker.acquire():
+        raise ModelUnavailable(model_name)
+    started = time.monotonic()
+    try:
+        model = genai.GenerativeModel(model_name)
+        _use_client(model, client)
+        if schema is None:
+            response = await model.generate_content_async(prompt)
+        else:
+            response = await model.generate_content_async(prompt, generation_config=_json_config(schema))
+        text = response.text
+        if not text:
+            raise ValueError("Empty response")
+        if validate:
+            validate(text)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        # Quota errors won't clear on the next request: open right away
+        breaker.record_failure(time.monotonic() - started, trip=isinstance(e, google_exceptions.ResourceExhausted))
+        raise
+    breaker.record_success(time.monotonic() - started)
+    return text
+
+async def _hedged_call(key: str, client, primary: str, backup: str, prompt: str, validate: Optional[Callable[[str], Any]] = None, schema: Optional[dict] = None) -> str:
+    """
+    Calls primary; if it hasn't answered within its hedge delay (a latency
+    percentile), also calls backup. The first valid answer wins and the other
+    call is cancelled. A primary that fails early hands over to backup at once.
+    """
+    delay = model_health.hedge_delay(key, primary, HEDGE_PERCENTILE, HEDGE_DEFAULT_DELAY, HEDGE_MIN_DELAY)
+    hedge_stats.requests += 1
+    primary_task = asyncio.create_task(_call_model(key, client, primary, prompt, validate, schema))
+    backup_task = None
+    pending = {primary_task}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=delay if backup_task is None else None, return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is backup_task:
+                        hedge_stats.backup_wins += 1
+                    return task.result()
+                print(f"Model {primary if task is primary_task else backup} failed: {task.exception()}")
+            if backup_task is None:
+                if not done:
+                    hedge_stats.hedges += 1
+                backup_task = asyncio.create_task(_call_model(key, client, backup, prompt, validate, schema))
+                pending.add(backup_task)
+        raise Exception(f"Models {primary} and {backup} failed.")
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _generate_with_retry(prompt: str, api_key: Optional[str] = None, validate: Optional[Callable[[str], Any]] = None, hedge: Optional[bool] = None, schema: Optional[dict] = None) -> str:
+    """
+    Answers prompt with the healthiest available model, falling back down the
+    chain. validate may raise to reject an answer (it then counts as a failure);
+    schema asks the model for JSON of that shape.
+    With hedging (PLANOUT_LLM_HEDGE, or hedge=True) the first two models race.
+    """
+    # A key sent with the request (BYOK) wins over the configured default
+    key = api_key or DEFAULT_API_KEY
+    if not key:
         raise Exception("No Gemini API Key provided or configured.")
+    await rate_limiter.acquire(key)
+    client = client_pool.get(key)
 
-    for model_name in MODELS:
+    models = model_health.order(key, MODELS)
+    if (HEDGE if hedge is None else hedge) and len(models) >= 2:
         try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            if response.text:
-                return response.text
+            return await _hedged_call(key, client, models[0], models[1], prompt, validate, schema)
+        except Exception as e:
+            print(f"Hedged call failed: {e}")
+            models = models[2:]
+
+    for model_name in models:
+        try:
+            return await _call_model(key, client, model_name, prompt, validate, schema)
+        except ModelUnavailable:
+            continue
         except Exception as e:
             print(f"Model {model_name} failed: {e}")
             continue
     raise Exception("All Gemini models failed.")
 
-def generate_plan_suggestions(plan_title: str, plan_description: str, plan_deadline=None, api_key: Optional[str] = None) -> List[dict]:
-    
+async def _stream_with_retry(prompt: str, api_key: Optional[str] = None, schema: Optional[dict] = None, checker: Optional[Callable[[], Callable[[str], bool]]] = None) -> AsyncIterator[str]:
+    """
+    Streams the answer text from the first healthy model.
+    checker makes a fresh check per model that is fed each piece and returns
+    True once the text so far holds a valid answer; pieces are held back until
+    then, and a stream that ends without one counts as a failure, so the next
+    model is tried. Falls back only until the first piece has been yielded;
+    after that a failure propagates, since the caller has consumed output.
+    """
+    key = api_key or DEFAULT_API_KEY
+    if not key:
+        raise Exception("No Gemini API Key provided or configured.")
+    await rate_limiter.acquire(key)
+    client = client_pool.get(key)
+
+    for model_name in model_health.order(key, MODELS):
+        breaker = model_health.breaker(key, model_name)
+        if not breaker.acquire():
+            continue
+        started = time.monotonic()
+        check = checker() if checker else None
+        held: List[str] = []
+        yielded = False
+        finished = False
+        try:
+            model = genai.GenerativeModel(model_name)
+            _use_client(model, client)
+            response = await model.generate_content_async(prompt, stream=True, generation_config=_json_config(schema))
+            async for part in response:
+                text = part.text
+                if not text:
+                    continue
+                if not yielded:
+                    held.append(text)
+                    if check is not None and not check(text):
+                        continue
+                    text = "".join(held)
+                yielded = True
+                yield text
+            finished = True
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - started, trip=isinstance(e, google_exceptions.ResourceExhausted))
+            print(f"Model {model_name} failed while streaming: {e}")
+            if yielded:
+                raise
+            continue
+        finally:
+            if not finished:
+                # Cancelled or closed early by the consumer: no verdict
+                breaker.release()
+        if yielded:
+            breaker.record_success(time.monotonic() - started)
+            return
+        # Empty, or nothing valid in it
+        breaker.record_failure(time.monotonic() - started)
+        print(f"Model {model_name} streamed no valid answer")
+    raise Exception("All Gemini models failed.")
+
+async def _generate_json(prompt: str, parse: Callable[[str], Any], schema: dict, api_key: Optional[str] = None, use_cache: bool = True):
+    """
+    Generates a schema-constrained JSON answer and returns parse(answer),
+    going through the prompt cache. parse extracts and validates (see
+    app/llm_output.py); an answer it rejects counts as a model failure, so
+    the next model is tried instead of failing the request.
+    use_cache=False skips the lookup but still stores the fresh answer.
+    The cache is best effort: if it is unavailable, the call goes to Gemini.
+    """
+    key = prompt_key(prompt, MODELS)
+    if use_cache:
+        try:
+            cached = await prompt_cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            print(f"AI cache read failed: {e}")
+
+    # Identical prompts already in flight for this key share that call
+    text = await in_flight.do(
+        (key_id(api_key or DEFAULT_API_KEY or ""), key),
+        lambda: _generate_with_retry(prompt, api_key=api_key, validate=parse, schema=schema),
+    )
+    data = parse(text)
+    try:
+        # Stored already validated and normalized
+        await prompt_cache.set(key, json.dumps(data, ensure_ascii=False))
+    except Exception as e:
+        print(f"AI cache write failed: {e}")
+    return data
+
+def _plan_prompt(plan_title: str, plan_description: str, plan_deadline=None) -> str:
     context = ""
     if plan_deadline:
         context = f"The plan must be completed by {plan_deadline}. Ensure tasks fit within this timeframe."
 
-    prompt = f"""
+    return f"""
     You are an expert project planner. Create a list of 3-5 concrete recurring or single tasks to achieve this goal:
     Title: {plan_title}
     Description: {plan_description}
@@ -76,47 +410,85 @@ def generate_plan_suggestions(plan_title: str, plan_description: str, plan_deadl
     ]
     """
 
-    # try: (REMOVED: Let exception propagate so main.py catches it)
-    text = _generate_with_retry(prompt, api_key=api_key)
-    text = text.replace("```json", "").replace("```", "").strip()
-    tasks = json.loads(text)
-    
-    # Post-processing: Calculate deadlines if missing
-    from datetime import datetime, timedelta
-    now = datetime.now()
-    
+def _postprocess_tasks(tasks: List[dict], now: datetime) -> List[dict]:
+    # Map estimated_total_hours to estimated_hours for frontend compatibility if needed
     for task in tasks:
-        # Map estimated_total_hours to estimated_hours for frontend compatibility if needed
         task['estimated_hours'] = task.get('estimated_total_hours', task.get('estimated_hours', 5))
-        
-        if not task.get('deadline'):
-            try:
-                total_hours = float(task['estimated_hours'])
-                session_min = int(task.get('duration_minutes', 60))
-                freq = task.get('frequency', 'Daily')
-                
-                if session_min <= 0: session_min = 60
-                session_hours = session_min / 60.0
-                
-                sessions_needed = total_hours / session_hours
-                
-                # Multipliers (Days)
-                multiplier = 1
-                if freq == 'Weekly': multiplier = 7
-                elif freq == 'Monthly': multiplier = 30
-                elif freq == 'Once': multiplier = 1 
-                
-                total_days = sessions_needed * multiplier
-                
-                calc_deadline = now + timedelta(days=int(total_days))
-                task['deadline'] = calc_deadline.strftime("%Y-%m-%d")
-            except Exception as e:
-                print(f"Error calculating deadline for task {task.get('title')}: {e}")
 
+    # Calculate missing deadlines for all tasks at once (app/deadlines.py)
+    missing = [task for task in tasks if not task.get('deadline')]
+    if missing:
+        def number(value, default):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return default
+        minutes = [number(task.get('duration_minutes', 60), 60) for task in missing]
+        deadlines, valid = compute_deadlines(
+            [number(task['estimated_hours'], float("nan")) for task in missing],
+            [m if m > 0 else 60 for m in minutes],
+            [task.get('frequency', 'Daily') for task in missing],
+            now,
+        )
+        for task, deadline, ok in zip(missing, deadlines, valid):
+            if ok:
+                task['deadline'] = str(deadline.astype("datetime64[D]"))
+            else:
+                print(f"Could not calculate a deadline for task {task.get('title')}")
     return tasks
 
-def generate_chunk_details(chunk_title: str, api_key: Optional[str] = None) -> dict:
-    prompt = f"""
+def _parse_tasks(text: str) -> List[dict]:
+    return parse_items(text, SuggestedTask)
+
+async def generate_plan_suggestions(plan_title: str, plan_description: str, plan_deadline=None, api_key: Optional[str] = None, use_cache: bool = True) -> List[dict]:
+    prompt = _plan_prompt(plan_title, plan_description, plan_deadline)
+    # Exceptions propagate so main.py can turn them into a 400
+    tasks = await _generate_json(prompt, _parse_tasks, TASKS_SCHEMA, api_key=api_key, use_cache=use_cache)
+    now = datetime.now()
+    return _postprocess_tasks(tasks, now)
+
+def _task_checker() -> Callable[[str], bool]:
+    # A streamed answer is usable once it holds one valid task
+    parser = JsonArrayStream()
+    def check(piece: str) -> bool:
+        return any(validate_item(SuggestedTask, item) is not None for item in parser.feed(piece))
+    return check
+
+async def stream_plan_suggestions(plan_title: str, plan_description: str, plan_deadline=None, api_key: Optional[str] = None, use_cache: bool = True) -> AsyncIterator[dict]:
+    """
+    Yields suggested tasks one by one as the model streams them out.
+    Same prompt, cache and post-processing as generate_plan_suggestions.
+    """
+    prompt = _plan_prompt(plan_title, plan_description, plan_deadline)
+    key = prompt_key(prompt, MODELS)
+    now = datetime.now()
+    if use_cache:
+        try:
+            cached = await prompt_cache.get(key)
+        except Exception as e:
+            print(f"AI cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            for task in _postprocess_tasks(json.loads(cached), now):
+                yield task
+            return
+
+    parser = JsonArrayStream()
+    pieces = []
+    async for piece in _stream_with_retry(prompt, api_key=api_key, schema=TASKS_SCHEMA, checker=_task_checker):
+        pieces.append(piece)
+        for item in parser.feed(piece):
+            task = validate_item(SuggestedTask, item)
+            if task is not None:
+                yield _postprocess_tasks([task], now)[0]
+
+    try:
+        await prompt_cache.set(key, json.dumps(_parse_tasks("".join(pieces)), ensure_ascii=False))
+    except Exception as e:
+        print(f"Streamed answer not cached: {e}")
+
+def _chunk_details_prompt(chunk_title: str) -> str:
+    return f"""
     Suggest optimal execution details for a task titled: "{chunk_title}".
     Return ONLY a raw JSON object. No markdown.
     Fields:
@@ -125,15 +497,115 @@ def generate_chunk_details(chunk_title: str, api_key: Optional[str] = None) -> d
     - frequency (string: "Once", "Daily", "Weekly", "Monthly")
     """
 
+def _batch_details_prompt(chunk_titles: List[str]) -> str:
+    tasks = "\n".join(f"    {index}: {json.dumps(title, ensure_ascii=False)}" for index, title in enumerate(chunk_titles, 1))
+    return f"""
+    Suggest optimal execution details for each of these numbered tasks:
+{tasks}
+
+    Return ONLY a raw JSON array. No markdown. One object per task, with fields:
+    - task (int, the task number above)
+    - description (string, actionable advice)
+    - duration_minutes (int)
+    - frequency (string: "Once", "Daily", "Weekly", "Monthly")
+
+    Example JSON:
+    [
+        {{ "task": 1, "description": "Read one chapter", "duration_minutes": 45, "frequency": "Daily" }}
+    ]
+    """
+
+FALLBACK_DETAILS = {
+    "description": "Could not generate details.",
+    "duration_minutes": 30,
+    "frequency": "Once"
+}
+
+# Titles per batch prompt; bigger batches mean longer answers and more to lose if one fails
+DETAILS_BATCH_SIZE = int(os.getenv("PLANOUT_DETAILS_BATCH_SIZE", "20"))
+# Single-title calls in flight at once for titles a batch answer left out
+DETAILS_FALLBACK_CONCURRENCY = int(os.getenv("PLANOUT_DETAILS_FALLBACK_CONCURRENCY", "4"))
+
+async def generate_chunk_details(chunk_title: str, api_key: Optional[str] = None, use_cache: bool = True) -> dict:
     try:
-        text = _generate_with_retry(prompt, api_key=api_key)
-        text = text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(text)
-        return data
+        return await _generate_json(
+            _chunk_details_prompt(chunk_title), lambda text: parse_object(text, ChunkDetails), DETAILS_SCHEMA,
+            api_key=api_key, use_cache=use_cache,
+        )
+    except RateLimited:
+        raise
     except Exception as e:
         print(f"Gemini Details Error (All models): {e}")
-        return {
-            "description": "Could not generate details.",
-            "duration_minutes": 30,
-            "frequency": "Once"
-        }
+        return dict(FALLBACK_DETAILS)
+
+async def _fallback_details(chunk_title: str, limit: asyncio.Semaphore, api_key: Optional[str], use_cache: bool) -> dict:
+    # Best effort per title: running out of rate budget here must not throw
+    # away the details the batch already produced
+    async with limit:
+        try:
+            return await generate_chunk_details(chunk_title, api_key=api_key, use_cache=use_cache)
+        except RateLimited as e:
+            print(f"Gemini details for {chunk_title!r} skipped: {e}")
+            return dict(FALLBACK_DETAILS)
+
+async def _generate_details_group(chunk_titles: List[str], api_key: Optional[str], use_cache: bool) -> Dict[str, dict]:
+    items = await _generate_json(
+        _batch_details_prompt(chunk_titles), lambda text: parse_items(text, NumberedChunkDetails), NUMBERED_DETAILS_SCHEMA,
+        api_key=api_key, use_cache=use_cache,
+    )
+    results = {}
+    for item in items:
+        index = item.pop("task")
+        if 1 <= index <= len(chunk_titles):
+            results.setdefault(chunk_titles[index - 1], item)
+    # Later single-title requests for these titles become cache hits
+    try:
+        await prompt_cache.set_many({
+            prompt_key(_chunk_details_prompt(title), MODELS): json.dumps(item, ensure_ascii=False)
+            for title, item in results.items()
+        })
+    except Exception as e:
+        print(f"AI cache write failed: {e}")
+    return results
+
+async def generate_chunk_details_batch(chunk_titles: List[str], api_key: Optional[str] = None, use_cache: bool = True) -> Dict[str, dict]:
+    """
+    Details for many titles in as few LLM calls as possible: titles already
+    answered come from the cache, the rest are packed DETAILS_BATCH_SIZE per
+    prompt (groups run concurrently) with a numbered JSON answer. Titles a
+    batch failed on or left out fall back to generate_chunk_details, a few at
+    a time; a title that hits the rate limit there gets FALLBACK_DETAILS.
+    """
+    titles = list(dict.fromkeys(chunk_titles))
+    results: Dict[str, dict] = {}
+    if use_cache:
+        for title in titles:
+            try:
+                cached = await prompt_cache.get(prompt_key(_chunk_details_prompt(title), MODELS))
+            except Exception as e:
+                print(f"AI cache read failed: {e}")
+                break
+            if cached is not None:
+                results[title] = json.loads(cached)
+
+    missing = [title for title in titles if title not in results]
+    groups = [missing[i:i + DETAILS_BATCH_SIZE] for i in range(0, len(missing), DETAILS_BATCH_SIZE)]
+    answers = await asyncio.gather(
+        *[_generate_details_group(group, api_key, use_cache) for group in groups],
+        return_exceptions=True,
+    )
+    if answers and all(isinstance(answer, RateLimited) for answer in answers):
+        # Nothing reached the model: the caller should back off, not get fallbacks
+        raise answers[0]
+    for answer in answers:
+        if isinstance(answer, Exception):
+            print(f"Gemini batch details failed: {answer}")
+            continue
+        results.update(answer)
+
+    leftovers = [title for title in titles if title not in results]
+    if leftovers:
+        limit = asyncio.Semaphore(DETAILS_FALLBACK_CONCURRENCY)
+        singles = await asyncio.gather(*[_fallback_details(title, limit, api_key, use_cache) for title in leftovers])
+        results.update(zip(leftovers, singles))
+    return {title: results[title] for title in titles}
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+# Strong ETags for plan resources, derived from the per-plan version counter
+# that every plan and chunk write bumps.
+
+def plan_etag(plan_id: str, version: int) -> str:
+    return f'"{plan_id}.{version}"'
+
+def plan_list_etag(include: str, rows: Iterable[Tuple[str, int]], cursor: Optional[str]) -> str:
+    digest = hashlib.sha1(include.encode())
+    for plan_id, version in rows:
+        digest.update(f"|{plan_id}.{version}".encode())
+    digest.update(f"|{cursor or ''}".encode())
+    return f'"{digest.hexdigest()}"'
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """
+    True when an If-None-Match header matches etag (RFC 9110 weak comparison,
+    which is what If-None-Match uses).
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def no_cache(header: Optional[str]) -> bool:
+    """True when a request's Cache-Control asks for a fresh answer."""
+    if not header:
+        return False
+    directives = {part.strip().lower().replace(" ", "") for part in header.split(",")}
+    return bool(directives & {"no-cache", "no-store", "max-age=0"})
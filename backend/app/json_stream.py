@@ -0,0 +1,88 @@
+import re
+import json
+from typing import Any, List
+
+# Incremental parser for a streamed JSON array of objects.
+# LLM output arrives in arbitrary text pieces; feed() returns every object
+# that became complete with that piece, so callers can act on the first task
+# long before the closing bracket. Anything before the opening "[" (markdown
+# fences, stray prose) is ignored, as is everything after the closing "]".
+# Only structural characters are visited: plain text is skipped by regex.
+
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+
+class JsonArrayStream:
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.errors = 0
+        self._buffer = ""
+        self._pos = 0
+        self._object_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Any]:
+        if self.done:
+            return []
+        self._buffer += text
+        if not self.started:
+            start = self._buffer.find("[")
+            if start < 0:
+                self._buffer = ""
+                return []
+            self.started = True
+            self._buffer = self._buffer[start + 1:]
+            self._pos = 0
+
+        items = []
+        buffer = self._buffer
+        pos = self._pos
+        if self._escaped and pos < len(buffer):
+            self._escaped = False
+            pos += 1
+        while True:
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            pos = match.end()
+            if self._in_string:
+                if char == "\\":
+                    if pos >= len(buffer):
+                        self._escaped = True
+                        break
+                    pos += 1
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                # Strings only matter inside objects; top-level strings are skipped
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = match.start()
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    if char == "]":
+                        self.done = True
+                        break
+                    continue
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        items.append(json.loads(buffer[self._object_start:pos]))
+                    except ValueError:
+                        self.errors += 1
+                    self._object_start = None
+
+        # Drop what has been consumed, keeping any object still in progress
+        keep_from = self._object_start if self._object_start is not None else pos
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+        return items
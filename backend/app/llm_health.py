@@ -0,0 +1,164 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict, deque
+from statistics import median
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Health-aware ordering of the Gemini model fallback chain.
+# Every model has a circuit breaker and a rolling window of (ok, latency)
+# samples. Open breakers are skipped outright instead of paying their failure
+# latency on every request; after a cooldown a single half-open probe decides
+# whether the model comes back. Models that are available are tried in order
+# of expected time to a good answer, preference order breaking ties.
+# Quotas are per API key, so health is tracked per (key, model).
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown: float, window: int, clock: Callable[[], float]):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opens = 0
+        self.samples: Deque[Tuple[bool, float]] = deque(maxlen=window)
+
+    def available(self) -> bool:
+        if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probing = False
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self.probing)
+
+    def acquire(self) -> bool:
+        """Claims the right to call the model; half-open allows one probe at a time."""
+        if not self.available():
+            return False
+        if self.state == HALF_OPEN:
+            self.probing = True
+        return True
+
+    def record_success(self, latency: float):
+        self.samples.append((True, latency))
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.probing = False
+
+    def record_failure(self, latency: float, trip: bool = False):
+        self.samples.append((False, latency))
+        self.consecutive_failures += 1
+        if trip or self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opens += 1
+            self.state = OPEN
+            self.opened_at = self.clock()
+            self.probing = False
+
+    def release(self):
+        """Gives back a half-open probe that ended without a verdict (e.g. cancelled)."""
+        self.probing = False
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def score(self) -> Optional[float]:
+        """Expected seconds to a good answer; None until there are samples."""
+        if not self.samples:
+            return None
+        latencies = [latency for ok, latency in self.samples if ok]
+        if not latencies:
+            return float("inf")
+        return median(latencies) / max(1.0 - self.error_rate(), 0.05)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def stats(self) -> Dict[str, object]:
+        p50, p95 = self.latency_percentile(0.5), self.latency_percentile(0.95)
+        return {
+            "state": self.state,
+            "samples": len(self.samples),
+            "error_rate": round(self.error_rate(), 4),
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "opens": self.opens,
+        }
+
+def key_id(api_key: str) -> str:
+    # Never keep or report raw keys
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+class ModelHealth:
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0, window: int = 50, max_keys: int = 64, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self._breakers: "OrderedDict[str, Dict[str, CircuitBreaker]]" = OrderedDict()
+
+    def breaker(self, api_key: str, model: str) -> CircuitBreaker:
+        scope = key_id(api_key)
+        models = self._breakers.get(scope)
+        if models is None:
+            models = self._breakers[scope] = {}
+            while len(self._breakers) > self.max_keys:
+                self._breakers.popitem(last=False)
+        self._breakers.move_to_end(scope)
+        if model not in models:
+            models[model] = CircuitBreaker(self.failure_threshold, self.cooldown, self.window, self.clock)
+        return models[model]
+
+    def order(self, api_key: str, models: Sequence[str]) -> List[str]:
+        """Available models, best expected time to answer first."""
+        ranked = []
+        for index, model in enumerate(models):
+            breaker = self.breaker(api_key, model)
+            if breaker.available():
+                score = breaker.score()
+                ranked.append((float("inf") if score is None else score, index, model))
+        ranked.sort()
+        return [model for _, _, model in ranked]
+
+    def hedge_delay(self, api_key: str, model: str, percentile: float, default: float, floor: float, min_samples: int = 5) -> float:
+        """How long to wait for model before hedging: its latency percentile."""
+        breaker = self.breaker(api_key, model)
+        if sum(1 for ok, _ in breaker.samples if ok) < min_samples:
+            return default
+        return max(floor, breaker.latency_percentile(percentile))
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        return {
+            scope: {model: breaker.stats() for model, breaker in models.items()}
+            for scope, models in self._breakers.items()
+        }
+
+model_health = ModelHealth(
+    failure_threshold=int(os.getenv("PLANOUT_LLM_FAILURE_THRESHOLD", "3")),
+    cooldown=float(os.getenv("PLANOUT_LLM_BREAKER_COOLDOWN", "30")),
+)
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedges = 0
+        self.backup_wins = 0
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "backup_wins": self.backup_wins,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "backup_win_rate": round(self.backup_wins / self.hedges, 4) if self.hedges else 0.0,
+        }
+
+hedge_stats = HedgeStats()
@@ -0,0 +1,131 @@
+import json
+from typing import Any, List, Optional, Type
+from pydantic import BaseModel, ValidationError, field_validator
+from app.models import Frequency
+from app.json_stream import JsonArrayStream
+
+# Shapes of the JSON the Gemini prompts ask for.
+# The same shapes go to the model as response_schema (so it is constrained to
+# emit them) and are checked here with Pydantic on the way back. The
+# extractors recover the JSON from noisy text (fences, prose, a truncated
+# array) so one stray sentence no longer turns into a 400 and a retry.
+
+class _LLMItem(BaseModel):
+    @field_validator("frequency", mode="before", check_fields=False)
+    @classmethod
+    def _frequency_case(cls, value):
+        # "daily", " Weekly " -> the enum's spelling
+        return value.strip().capitalize() if isinstance(value, str) else value
+
+class SuggestedTask(_LLMItem):
+    title: str
+    description: str = ""
+    estimated_total_hours: Optional[float] = None
+    estimated_hours: Optional[float] = None
+    duration_minutes: int = 60
+    frequency: Frequency = Frequency.DAILY
+    deadline: Optional[str] = None
+
+class ChunkDetails(_LLMItem):
+    description: str
+    duration_minutes: int
+    frequency: Frequency
+
+class NumberedChunkDetails(ChunkDetails):
+    task: int
+
+_FREQUENCY = {"type": "string", "enum": [f.value for f in Frequency]}
+_DETAILS_PROPERTIES = {
+    "description": {"type": "string"},
+    "duration_minutes": {"type": "integer"},
+    "frequency": _FREQUENCY,
+}
+
+TASKS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "description": {"type": "string"},
+            "estimated_total_hours": {"type": "number"},
+            "duration_minutes": {"type": "integer"},
+            "frequency": _FREQUENCY,
+            "deadline": {"type": "string", "nullable": True},
+        },
+        "required": ["title", "description", "estimated_total_hours", "duration_minutes", "frequency"],
+    },
+}
+DETAILS_SCHEMA = {
+    "type": "object",
+    "properties": _DETAILS_PROPERTIES,
+    "required": ["description", "duration_minutes", "frequency"],
+}
+NUMBERED_DETAILS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"task": {"type": "integer"}, **_DETAILS_PROPERTIES},
+        "required": ["task", "description", "duration_minutes", "frequency"],
+    },
+}
+
+class UnparsableOutput(ValueError):
+    pass
+
+def _strip_fences(text: str) -> str:
+    return text.replace("```json", "").replace("```", "").strip()
+
+def extract_json(text: str, expect: type) -> Any:
+    """
+    The first JSON value of type expect (list or dict) in text. Tries the
+    whole text first, then each "[" / "{" in turn; a list that was cut off
+    mid-way gives back the objects that were complete.
+    """
+    text = _strip_fences(text)
+    try:
+        value = json.loads(text)
+        if isinstance(value, expect):
+            return value
+    except ValueError:
+        pass
+
+    decoder = json.JSONDecoder()
+    opener = "[" if expect is list else "{"
+    start = text.find(opener)
+    while start >= 0:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, expect):
+                return value
+        except ValueError:
+            pass
+        start = text.find(opener, start + 1)
+
+    if expect is list:
+        stream = JsonArrayStream()
+        items = stream.feed(text)
+        if items:
+            return items
+    raise UnparsableOutput(f"No JSON {expect.__name__} in model output")
+
+def validate_item(model: Type[BaseModel], item: Any) -> Optional[dict]:
+    """item as a JSON-ready dict, or None if it doesn't fit model."""
+    try:
+        return model.model_validate(item).model_dump(mode="json", exclude_none=True)
+    except ValidationError:
+        return None
+
+def parse_items(text: str, model: Type[BaseModel]) -> List[dict]:
+    """Valid items of a JSON array in text; invalid items are dropped."""
+    items = [validate_item(model, item) for item in extract_json(text, list)]
+    valid = [item for item in items if item is not None]
+    if not valid:
+        raise UnparsableOutput(f"No valid {model.__name__} in model output")
+    return valid
+
+def parse_object(text: str, model: Type[BaseModel]) -> dict:
+    item = validate_item(model, extract_json(text, dict))
+    if item is None:
+        raise UnparsableOutput(f"Model output is not a valid {model.__name__}")
+    return item
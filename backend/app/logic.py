@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 from app.models import Chunk, ChunkStatus
+from app.deadlines import FREQUENCY_DAYS, deadline_for
+from app.scheduler import Task, schedule
 import re
 
 def suggest_chunks(description: str) -> List[Chunk]:
@@ -41,17 +43,85 @@ def suggest_chunks(description: str) -> List[Chunk]:
 
 def schedule_chunks(chunks: List[Chunk], start_date: datetime, chunks_per_day: int = 1) -> List[Chunk]:
     """
-    Assigns scheduled_date to chunks based on a simple cadence.
+    Assigns scheduled_date to chunks based on a simple cadence: chunks_per_day
+    of them a day, in order. Routes use app.scheduler directly, which also
+    counts session lengths and what other plans already have booked.
     """
-    current_date = start_date
-    chunks_scheduled_today = 0
-    
-    for chunk in chunks:
-        chunk.scheduled_date = current_date
-        chunks_scheduled_today += 1
-        
-        if chunks_scheduled_today >= chunks_per_day:
-            current_date += timedelta(days=1)
-            chunks_scheduled_today = 0
-            
+    placements = schedule([Task(minutes=1, sessions=1)] * len(chunks), capacity=chunks_per_day, horizon=len(chunks) + 1)
+    for chunk, placement in zip(chunks, placements):
+        chunk.scheduled_date = start_date + timedelta(days=placement.first)
     return chunks
+
+def calculate_deadline(total_hours: float, duration_minutes: int, frequency: str, start: datetime) -> Optional[datetime]:
+    """
+    When a task is done: sessions needed (total hours / session length)
+    spaced by the frequency, counted from start. See app/deadlines.py.
+    """
+    if duration_minutes <= 0:
+        duration_minutes = 60
+    return deadline_for(total_hours, duration_minutes, frequency, start)
+
+_FREQUENCY_HINTS = [
+    ("Daily", re.compile(r"\b(daily|every ?day|each day|per day|habit|practi[cs]e)\b", re.I)),
+    ("Weekly", re.compile(r"\b(weekly|every week|each week|per week|once a week)\b", re.I)),
+    ("Monthly", re.compile(r"\b(monthly|every month|each month|per month)\b", re.I)),
+]
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours?|m|min|mins|minutes?)\b", re.I)
+_STEP_PREFIX = re.compile(r"^(step\s*\d+\s*[:.)-]?\s*|\d+\s*[.)-]\s*|[-*•]\s*)", re.I)
+
+# Sessions a recurring task gets when the plan has no deadline to fill
+DEFAULT_SESSIONS = {"Once": 1, "Daily": 14, "Weekly": 6, "Monthly": 3}
+MAX_LOCAL_SUGGESTIONS = 10
+
+def suggest_tasks_local(title: str, description: str, deadline: Optional[datetime] = None, now: Optional[datetime] = None) -> List[dict]:
+    """
+    Deterministic suggestions in the same shape as the Gemini tier, in well
+    under a millisecond: suggest_chunks splits the description into tasks,
+    keywords pick frequency and session length, and the deadline math above
+    dates each task (never past the plan deadline).
+    """
+    now = now or datetime.now()
+    chunks = suggest_chunks(description or "")[:MAX_LOCAL_SUGGESTIONS]
+    if not chunks or (len(chunks) == 1 and chunks[0].title.startswith("Execute plan: ")):
+        chunks = [
+            Chunk(title=f"Outline the plan for {title}"),
+            Chunk(title=f"Work on {title}"),
+            Chunk(title="Review progress"),
+        ]
+        hints = ["Once", "Daily", "Weekly"]
+    else:
+        hints = [None] * len(chunks)
+
+    tasks = []
+    for chunk, hint in zip(chunks, hints):
+        text = chunk.title
+        frequency = hint or next((name for name, pattern in _FREQUENCY_HINTS if pattern.search(text)), "Once")
+        match = _DURATION.search(text)
+        if match:
+            amount = float(match.group(1))
+            duration = int(amount * 60) if match.group(2).lower().startswith("h") else int(amount)
+        else:
+            duration = 60 if frequency == "Once" else 30
+        duration = max(5, min(duration, 8 * 60))
+
+        sessions = DEFAULT_SESSIONS[frequency]
+        if deadline and frequency != "Once":
+            # Fill the time until the plan deadline
+            days_left = max((deadline - now).days, 1)
+            sessions = max(1, days_left // FREQUENCY_DAYS[frequency])
+        total_hours = round(sessions * duration / 60.0, 2)
+
+        task_deadline = calculate_deadline(total_hours, duration, frequency, now) or now
+        if deadline and task_deadline > deadline:
+            task_deadline = deadline
+        clean_title = _STEP_PREFIX.sub("", text).strip().rstrip(".") or text
+        tasks.append({
+            "title": clean_title[:1].upper() + clean_title[1:],
+            "description": "",
+            "estimated_total_hours": total_hours,
+            "estimated_hours": total_hours,
+            "duration_minutes": duration,
+            "frequency": frequency,
+            "deadline": task_deadline.strftime("%Y-%m-%d"),
+        })
+    return tasks
@@ -1,18 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Optional
-from app.models import Plan, Chunk, ChunkStatus, Frequency, PlanRead, PlanCreate, PlanUpdate
-from app.database import create_db_and_tables, get_session
-from sqlmodel import Session, select
+from typing import List, Dict, Optional, Literal
+from app.models import Plan, Chunk, ChunkBase, ChunkStatus, Frequency, PlanRead, PlanCreate, PlanUpdate, ChunkEvent, ChunkEventCreate, ChunkEventKind
+from app.database import get_async_session, get_read_session, async_read_session_maker
+from app.migrations import run_migrations
+from app.aggregates import ChunkState, apply_chunk_change, refresh_plan_deadline, bump_plan_version, recompute_plan
+from app.http_cache import plan_etag, plan_list_etag, if_none_match, no_cache
+from app.events import RESYNC, broker, format_sse
+from app.cache import CachedPage, plan_cache, plan_list_cache, occurrence_cache
+from app.ai_cache import prompt_cache
+from app.llm_health import model_health, hedge_stats
+from app.gemini import rate_limiter, in_flight
+from app.llm_output import UnparsableOutput
+from app.serializers import serialize_plan, serialize_plans, plan_to_dict, chunk_to_dict, dumps
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, decode_cursor, next_cursor
+from sqlmodel import select, and_, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import delete, update as update_stmt
 from sqlalchemy.orm import selectinload
-from pydantic import BaseModel
-from app.logic import suggest_chunks, schedule_chunks
-from datetime import datetime
+from pydantic import BaseModel, Field
+from app.logic import suggest_chunks, suggest_tasks_local
+from app.scheduler import reschedule, schedule_new_chunks
+from app.occurrences import MAX_RANGE_DAYS, occurrences_between
+from app.chunk_events import EVENT_STATUS, chunk_events, record_events, record_initial_history, replace_history, shift_occurrences
+from datetime import date, datetime
 from contextlib import asynccontextmanager
+import asyncio
+import math
+import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    run_migrations()
     yield
 
 # Trigger Reload
@@ -24,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Suggestion-Tier", "X-Late-Chunks"],
 )
 
 # Force Reload for Env Vars
@@ -34,34 +55,161 @@ def get_ai_status():
 
 from sqlalchemy.orm import selectinload
 
-@app.get("/plans", response_model=List[PlanRead])
-def read_plans(session: Session = Depends(get_session)):
-    plans = session.exec(select(Plan).options(selectinload(Plan.chunks))).all()
-    return plans
+@app.get("/plans")
+async def read_plans(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include: Literal["chunks", "summary", "none"] = "chunks",
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    # Keyset pagination on (created_at, id). The next page token is returned in
+    # the X-Next-Cursor header so the body stays a plain list of plans.
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    cache_key = (include, limit, cursor)
+    cached = plan_list_cache.get(cache_key)
+    if cached:
+        return cached_json_response(cached.etag, cached.body, if_none_match_header, cached.next_cursor)
+    epoch = plan_list_cache.epoch
+
+    page = select(Plan.id, Plan.version, Plan.created_at).order_by(Plan.created_at, Plan.id).limit(limit + 1)
+    if after:
+        after_created, after_id = after
+        page = page.where(or_(
+            Plan.created_at > after_created,
+            and_(Plan.created_at == after_created, Plan.id > after_id),
+        ))
+
+    # The page's ids and versions come from the plan table alone; they decide
+    # the ETag before any chunk is read.
+    probed = (await session.exec(page)).all()
+    token = next_cursor(probed, limit)
+    keys = probed[:limit]
+    etag = plan_list_etag(include, [(k.id, k.version) for k in keys], token)
+    if if_none_match(if_none_match_header, etag):
+        return cached_json_response(etag, b"", if_none_match_header, token)
+
+    query = select(Plan).where(Plan.id.in_([k.id for k in keys])).order_by(Plan.created_at, Plan.id)
+    if include == "chunks":
+        query = query.options(selectinload(Plan.chunks))
+    plans = (await session.exec(query)).all() if keys else []
+
+    # Summary reads the aggregates stored on the plan row, chunks are never loaded
+    body = serialize_plans(plans, include)
+
+    plan_list_cache.set(cache_key, CachedPage(
+        etag=etag,
+        body=body,
+        next_cursor=token,
+        plan_ids=frozenset(k.id for k in probed),
+        after=after,
+        until=(probed[-1].created_at, probed[-1].id) if token else None,
+    ), epoch=epoch)
+    return cached_json_response(etag, body, None, token)
+
+def plan_response(plan: Plan) -> Response:
+    # Write routes answer with the full plan through the same serializer as reads
+    return Response(content=serialize_plan(plan), media_type="application/json")
+
+def cached_json_response(etag: str, body: bytes, if_none_match_header: Optional[str], next_page: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if next_page:
+        headers["X-Next-Cursor"] = next_page
+    if if_none_match(if_none_match_header, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def load_plan(session: AsyncSession, plan_id: str) -> Optional[Plan]:
+    # Relationships can't lazy-load under asyncio, so anything returned as a
+    # PlanRead is fetched with its chunks eagerly.
+    query = (
+        select(Plan)
+        .where(Plan.id == plan_id)
+        .options(selectinload(Plan.chunks))
+        .execution_options(populate_existing=True)
+    )
+    return (await session.exec(query)).first()
+
+def invalidate_plan_reads(plan_id: str, created_key=None):
+    # Drop the cached plan and exactly the list pages that can contain it:
+    # pages that listed (or probed) it, plus, for a new plan, the page whose
+    # key range it falls into.
+    plan_cache.invalidate(plan_id)
+
+    def affected(key, page: CachedPage) -> bool:
+        if plan_id in page.plan_ids:
+            return True
+        if created_key is None:
+            return False
+        return (page.after is None or created_key > page.after) and (page.until is None or created_key <= page.until)
+
+    plan_list_cache.invalidate_where(affected)
+    # Occurrence ranges of this plan and of the whole workspace
+    occurrence_cache.invalidate_where(lambda key, body: key[2] in (None, plan_id))
+
+def publish_plan_changes(event_type: str, plan: Plan, created=(), updated=(), deleted=()):
+    # Call only after the commit: invalidates cached reads, then sends
+    # compact deltas to /events subscribers.
+    invalidate_plan_reads(plan.id, (plan.created_at, plan.id) if event_type == "plan.created" else None)
+    for chunk in created:
+        broker.publish("chunk.created", plan.id, version=plan.version, chunk=chunk_to_dict(chunk))
+    for chunk in updated:
+        broker.publish("chunk.updated", plan.id, version=plan.version, chunk=chunk_to_dict(chunk))
+    for chunk_id in deleted:
+        broker.publish("chunk.deleted", plan.id, version=plan.version, chunk_id=chunk_id)
+    broker.publish(event_type, plan.id, version=plan.version, plan=plan_to_dict(plan, "summary"))
 
 @app.post("/plans", response_model=PlanRead)
-def create_plan(plan_in: PlanCreate, session: Session = Depends(get_session)):
+async def create_plan(plan_in: PlanCreate, session: AsyncSession = Depends(get_async_session)):
     # Convert PlanCreate to Plan
-    db_plan = Plan.from_orm(plan_in)
+    db_plan = Plan.model_validate(plan_in)
     session.add(db_plan)
-    session.commit()
-    session.refresh(db_plan)
-    return db_plan
+    await session.commit()
+    publish_plan_changes("plan.created", db_plan)
+    return plan_response(await load_plan(session, db_plan.id))
 
 from app.models import Plan, Chunk, ChunkStatus, Frequency, PlanRead, PlanCreate, PlanUpdate
 
 # ... imports ...
 
 @app.get("/plans/{plan_id}", response_model=PlanRead)
-def get_plan(plan_id: str, session: Session = Depends(get_session)):
-    plan = session.exec(select(Plan).where(Plan.id == plan_id).options(selectinload(Plan.chunks))).first()
+async def get_plan(
+    plan_id: str,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    cached = plan_cache.get(plan_id)
+    if cached:
+        etag, body = cached
+        return cached_json_response(etag, body, if_none_match_header)
+    epoch = plan_cache.epoch
+
+    if if_none_match_header:
+        # Conditional GET: a primary-key lookup of the version, no chunk reads
+        version = (await session.exec(select(Plan.version).where(Plan.id == plan_id))).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        etag = plan_etag(plan_id, version)
+        if if_none_match(if_none_match_header, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    plan = await load_plan(session, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
-    return plan
+    etag = plan_etag(plan.id, plan.version)
+    body = serialize_plan(plan)
+    plan_cache.set(plan_id, (etag, body), epoch=epoch)
+    return cached_json_response(etag, body, None)
 
 @app.patch("/plans/{plan_id}", response_model=PlanRead)
-def update_plan(plan_id: str, plan_update: PlanUpdate, session: Session = Depends(get_session)):
-    plan = session.get(Plan, plan_id)
+async def update_plan(plan_id: str, plan_update: PlanUpdate, session: AsyncSession = Depends(get_async_session)):
+    plan = await session.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
@@ -74,69 +222,194 @@ def update_plan(plan_id: str, plan_update: PlanUpdate, session: Session = Depend
     if plan_update.deadline is not None:
         plan.deadline = plan_update.deadline
         
+    bump_plan_version(plan)
     session.add(plan)
-    session.commit()
-    session.refresh(plan)
-    return plan
+    await session.commit()
+    publish_plan_changes("plan.updated", plan)
+    return plan_response(await load_plan(session, plan_id))
 
-from app.gemini import generate_plan_suggestions
-from fastapi import Header
+from app.gemini import RateLimited, generate_plan_suggestions, stream_plan_suggestions, set_default_api_key
 
 @app.post("/plans/{plan_id}/breakdown", response_model=PlanRead)
-def breakdown_plan(plan_id: str, session: Session = Depends(get_session), x_gemini_api_key: Optional[str] = Header(None)):
-    plan = session.get(Plan, plan_id)
+async def breakdown_plan(plan_id: str, session: AsyncSession = Depends(get_async_session), x_gemini_api_key: Optional[str] = Header(None)):
+    plan = await session.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
     # Run logic (Heuristic does not usage AI, so no key needed yet)
     new_chunks = suggest_chunks(plan.description)
     
-    # Schedule them
-    scheduled_chunks = schedule_chunks(new_chunks, start_date=datetime.now())
+    # Schedule them around what every plan already has booked
+    scheduled_chunks = await schedule_new_chunks(session, new_chunks)
     
     for chunk in scheduled_chunks:
-        chunk.plan = plan
+        chunk.plan_id = plan.id
         session.add(chunk)
+        apply_chunk_change(plan, None, ChunkState.of(chunk))
     
-    session.commit()
-    session.refresh(plan)
-    return plan
+    bump_plan_version(plan)
+    session.add(plan)
+    await session.commit()
+    publish_plan_changes("plan.updated", plan, created=scheduled_chunks)
+    return plan_response(await load_plan(session, plan_id))
+
+def ai_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, RateLimited):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return HTTPException(status_code=400, detail=str(e))
+
+# Suggestion tiers: "local" answers from the deterministic planner in
+# app/logic.py, "ai" from Gemini only, "auto" from Gemini with the local
+# planner as fallback when Gemini fails or is slower than AI_SUGGEST_TIMEOUT.
+SuggestionTier = Literal["auto", "ai", "local"]
+AI_SUGGEST_TIMEOUT = float(os.getenv("PLANOUT_AI_SUGGEST_TIMEOUT", "8"))
+
+def suggestion_response(suggestions: List[dict], tier: str) -> Response:
+    return Response(content=dumps(suggestions), media_type="application/json", headers={"X-Suggestion-Tier": tier})
+
+def _report_background_failure(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background AI suggestion failed: {task.exception()}")
 
 @app.post("/plans/{plan_id}/suggest")
-def suggest_plan_breakdown(plan_id: str, session: Session = Depends(get_session), x_gemini_api_key: Optional[str] = Header(None)):
-    plan = session.get(Plan, plan_id)
+async def suggest_plan_breakdown(
+    plan_id: str,
+    tier: SuggestionTier = "auto",
+    x_gemini_api_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    # Don't hold a pooled read connection for the length of the LLM call
+    async with async_read_session_maker() as session:
+        plan = await session.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
-    
+
+    if tier == "local":
+        return suggestion_response(suggest_tasks_local(plan.title, plan.description, plan.deadline), "local")
+
+    ai = asyncio.ensure_future(generate_plan_suggestions(
+        plan.title, plan.description, plan.deadline,
+        api_key=x_gemini_api_key, use_cache=not no_cache(cache_control),
+    ))
+    if tier == "ai":
+        try:
+            return suggestion_response(await ai, "ai")
+        except Exception as e:
+            raise ai_http_error(e)
+
     try:
-        suggestions = generate_plan_suggestions(plan.title, plan.description, plan.deadline, api_key=x_gemini_api_key)
-        return suggestions
+        return suggestion_response(await asyncio.wait_for(asyncio.shield(ai), AI_SUGGEST_TIMEOUT), "ai")
+    except asyncio.TimeoutError:
+        # Let Gemini finish anyway: its answer lands in the prompt cache,
+        # so asking again gets the AI suggestions instantly
+        ai.add_done_callback(_report_background_failure)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        print(f"AI suggestions unavailable, using the local planner: {e}")
+    return suggestion_response(suggest_tasks_local(plan.title, plan.description, plan.deadline), "local")
+
+@app.post("/plans/{plan_id}/suggest/stream")
+async def stream_plan_breakdown(
+    plan_id: str,
+    tier: SuggestionTier = "auto",
+    x_gemini_api_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    """
+    Same suggestions as /suggest, as NDJSON: one task per line, sent as soon as
+    the model has produced it. A failure after the first task ends the stream
+    with an {"error": ...} line.
+    """
+    async with async_read_session_maker() as session:
+        plan = await session.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    async def local_tasks():
+        for task in suggest_tasks_local(plan.title, plan.description, plan.deadline):
+            yield task
 
-from app.gemini import generate_chunk_details
+    source = "local"
+    tasks = local_tasks()
+    if tier != "local":
+        ai_tasks = stream_plan_suggestions(
+            plan.title, plan.description, plan.deadline,
+            api_key=x_gemini_api_key, use_cache=not no_cache(cache_control),
+        )
+        try:
+            # Wait for the first task so early failures still get a proper status code
+            if tier == "ai":
+                first = await anext(ai_tasks, None)
+            else:
+                first = await asyncio.wait_for(anext(ai_tasks, None), AI_SUGGEST_TIMEOUT)
+            if first is None:
+                # As /suggest does for the same output: a 400 for tier=ai,
+                # the local planner for auto, never an empty 200
+                raise UnparsableOutput("No valid SuggestedTask in model output")
+            source = "ai"
+        except Exception as e:
+            await ai_tasks.aclose()
+            if tier == "ai":
+                raise ai_http_error(e)
+            print(f"AI suggestions unavailable, using the local planner: {e}")
+    if source == "ai":
+        tasks = ai_tasks
+    else:
+        first = await anext(tasks, None)
+
+    async def stream():
+        if first is None:
+            return
+        yield dumps(first) + b"\n"
+        try:
+            async for task in tasks:
+                yield dumps(task) + b"\n"
+        except Exception as e:
+            yield dumps({"error": str(e)}) + b"\n"
+        finally:
+            await tasks.aclose()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers={"X-Suggestion-Tier": source})
+
+from app.gemini import generate_chunk_details, generate_chunk_details_batch
 
 class ChunkSuggestionRequest(BaseModel):
     title: str
 
 @app.post("/chunks/suggest_details")
-def suggest_chunk_details_endpoint(req: ChunkSuggestionRequest, x_gemini_api_key: Optional[str] = Header(None)):
+async def suggest_chunk_details_endpoint(
+    req: ChunkSuggestionRequest,
+    x_gemini_api_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
     try:
-        return generate_chunk_details(req.title, api_key=x_gemini_api_key)
+        return await generate_chunk_details(req.title, api_key=x_gemini_api_key, use_cache=not no_cache(cache_control))
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise ai_http_error(e)
+
+class ChunkDetailsBatchRequest(BaseModel):
+    titles: List[str] = Field(max_length=200)
+
+@app.post("/chunks/suggest_details/batch")
+async def suggest_chunk_details_batch(
+    req: ChunkDetailsBatchRequest,
+    x_gemini_api_key: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+):
+    # {title: details}, one entry per distinct title; failures get the same fallback as the single endpoint
+    try:
+        return await generate_chunk_details_batch(req.titles, api_key=x_gemini_api_key, use_cache=not no_cache(cache_control))
+    except RateLimited as e:
+        raise ai_http_error(e)
 
 @app.post("/plans/{plan_id}/chunks")
-def add_chunks(plan_id: str, chunks: List[Chunk], session: Session = Depends(get_session)):
+async def add_chunks(plan_id: str, chunks: List[Chunk], session: AsyncSession = Depends(get_async_session)):
     try:
-        plan = session.get(Plan, plan_id)
+        plan = await session.get(Plan, plan_id)
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
         
-        scheduled_chunks = schedule_chunks(chunks, start_date=datetime.now())
-        
-        for chunk in scheduled_chunks:
-            chunk.plan = plan  # Associate
+        for chunk in chunks:
+            chunk.plan_id = plan.id  # Associate
             # Defensive conversion for SQLite
             if isinstance(chunk.deadline, str):
                 try:
@@ -149,11 +422,20 @@ def add_chunks(plan_id: str, chunks: List[Chunk], session: Session = Depends(get
                     except ValueError:
                         chunk.deadline = None # Fallback
 
+        scheduled_chunks = await schedule_new_chunks(session, chunks)
+        
+        for chunk in scheduled_chunks:
             session.add(chunk)
+            record_initial_history(session, chunk)
+            apply_chunk_change(plan, None, ChunkState.of(chunk))
         
-        session.commit()
-        session.refresh(plan)
-        return plan
+        bump_plan_version(plan)
+        session.add(plan)
+        await session.commit()
+        publish_plan_changes("plan.updated", plan, created=scheduled_chunks)
+        return plan_response(await load_plan(session, plan_id))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -168,35 +450,7 @@ class ChunkUpdate(BaseModel):
     deadline: Optional[datetime] = None
     history: Optional[dict] = None
 
-def recalculate_plan_deadline(session: Session, plan_id: str):
-    plan = session.get(Plan, plan_id)
-    if not plan: return
-    # session.refresh(plan) # Ensure chunks are loaded?
-    # Using SQL to aggregate might be faster but loading is fine for now
-    # We need to ensure chunks are loaded. PlanRead loads them via selectinload.
-    # Here we are in a request where we might have just added/updated.
-    # Let's simple query:
-    chunks = session.exec(select(Chunk).where(Chunk.plan_id == plan_id)).all()
-    deadlines = [c.deadline for c in chunks if c.deadline]
-    if deadlines:
-        plan.deadline = max(deadlines)
-    else:
-        plan.deadline = None
-    session.add(plan)
-    session.commit()
-    session.refresh(plan)
-
-@app.patch("/plans/{plan_id}/chunks/{chunk_id}")
-def update_chunk(plan_id: str, chunk_id: str, update: ChunkUpdate, session: Session = Depends(get_session)):
-    # Verify plan exists (optional but good practice)
-    plan = session.get(Plan, plan_id)
-    if not plan:
-        raise HTTPException(status_code=404, detail="Plan not found")
-    
-    chunk = session.get(Chunk, chunk_id)
-    if not chunk or chunk.plan_id != plan_id:
-        raise HTTPException(status_code=404, detail="Chunk not found")
-        
+def apply_chunk_update(session: AsyncSession, chunk: Chunk, update: ChunkUpdate):
     if update.title is not None:
         chunk.title = update.title
     if update.description is not None:
@@ -216,16 +470,238 @@ def update_chunk(plan_id: str, chunk_id: str, update: ChunkUpdate, session: Sess
     if update.deadline is not None:
         chunk.deadline = update.deadline
     if update.history is not None:
-        chunk.history = update.history
+        replace_history(session, chunk, update.history)
+
+def chunk_update_values(update: ChunkUpdate) -> Dict[str, object]:
+    # Column values for a PATCH without history (see update_chunk)
+    values = {}
+    if update.title is not None:
+        values["title"] = update.title
+    if update.description is not None:
+        values["description"] = update.description
+    if update.status is not None:
+        if update.status not in ["TODO", "IN_PROGRESS", "DONE", "SKIPPED", "DEFERRED"]:
+            raise HTTPException(status_code=400, detail="Invalid status")
+        values["status"] = ChunkStatus(update.status)
+    if update.duration_minutes is not None:
+        values["duration_minutes"] = update.duration_minutes
+    if update.frequency is not None:
+        try:
+            values["frequency"] = Frequency(update.frequency).value
+        except ValueError:
+            values["frequency"] = update.frequency
+    if update.deadline is not None:
+        values["deadline"] = update.deadline
+    return values
+
+async def chunk_not_found(session: AsyncSession, plan_id: str) -> HTTPException:
+    # Only on the error path: tell a missing plan from a missing chunk
+    if await session.get(Plan, plan_id) is None:
+        return HTTPException(status_code=404, detail="Plan not found")
+    return HTTPException(status_code=404, detail="Chunk not found")
+
+chunk_table = Chunk.__table__
+
+@app.patch("/plans/{plan_id}/chunks/{chunk_id}")
+async def update_chunk(plan_id: str, chunk_id: str, update: ChunkUpdate, session: AsyncSession = Depends(get_async_session)):
+    if update.history is not None:
+        return await update_chunk_history(plan_id, chunk_id, update, session)
+
+    # Fast path, one transaction of two statements: the chunk UPDATE ...
+    # RETURNING (scoped to the plan, so it doubles as the existence check)
+    # and a set-based recompute of the plan's aggregates and deadline.
+    values = chunk_update_values(update) or {"plan_id": plan_id}
+    row = (await session.exec(
+        update_stmt(chunk_table)
+        .where(chunk_table.c.id == chunk_id, chunk_table.c.plan_id == plan_id)
+        .values(**values)
+        .returning(*chunk_table.c)
+    )).first()
+    if row is None:
+        raise await chunk_not_found(session, plan_id)
+    plan = await recompute_plan(session, plan_id)
+    if plan is None:  # chunk pointing at a deleted plan; rolled back on close
+        raise HTTPException(status_code=404, detail="Plan not found")
+    await session.commit()
+
+    chunk = Chunk(**row._mapping)
+    publish_plan_changes("plan.updated", plan, updated=[chunk])
+    return chunk
+
+async def update_chunk_history(plan_id: str, chunk_id: str, update: ChunkUpdate, session: AsyncSession):
+    # Whole-history PATCHes are diffed against the stored view into events,
+    # so they load the chunk first.
+    plan = await session.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
     
-    session.add(chunk)
-    session.commit()
-    session.refresh(chunk)
+    chunk = await session.get(Chunk, chunk_id)
+    if not chunk or chunk.plan_id != plan_id:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+    before = ChunkState.of(chunk)
+    apply_chunk_update(session, chunk, update)
     
-    recalculate_plan_deadline(session, plan_id)
+    session.add(chunk)
+    # Plan aggregates move in the same transaction as the chunk
+    if apply_chunk_change(plan, before, ChunkState.of(chunk)):
+        await refresh_plan_deadline(session, plan)
+    bump_plan_version(plan)
+    session.add(plan)
+    await session.commit()
+    publish_plan_changes("plan.updated", plan, updated=[chunk])
     
     return chunk
 
+@app.post("/plans/{plan_id}/chunks/{chunk_id}/events")
+async def append_chunk_event(plan_id: str, chunk_id: str, event: ChunkEventCreate, session: AsyncSession = Depends(get_async_session)):
+    # One skip/defer/done for one day: appended to the log and folded into
+    # chunk.history, instead of the client sending the whole history back.
+    plan = await session.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    chunk = await session.get(Chunk, chunk_id)
+    if not chunk or chunk.plan_id != plan_id:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+
+    before = ChunkState.of(chunk)
+    day = event.day.isoformat()
+    record_events(session, chunk, [(event.kind.value, day, event.target.isoformat() if event.target else None)])
+    # A skipped occurrence is made up at the end, so the deadline moves with it
+    if event.kind in (ChunkEventKind.SKIP, ChunkEventKind.UNSKIP) and (chunk.deadline or chunk.scheduled_date):
+        deadline = shift_occurrences(chunk.deadline or chunk.scheduled_date, chunk.frequency, 1 if event.kind == ChunkEventKind.SKIP else -1)
+        if chunk.scheduled_date and deadline < chunk.scheduled_date:
+            deadline = chunk.scheduled_date
+        chunk.deadline = deadline
+    status = event.status or EVENT_STATUS.get(event.kind)
+    if status is not None:
+        chunk.status = status
+
+    session.add(chunk)
+    if apply_chunk_change(plan, before, ChunkState.of(chunk)):
+        await refresh_plan_deadline(session, plan)
+    bump_plan_version(plan)
+    session.add(plan)
+    await session.commit()
+    publish_plan_changes("plan.updated", plan, updated=[chunk])
+    return chunk
+
+@app.get("/plans/{plan_id}/chunks/{chunk_id}/events")
+async def read_chunk_events(plan_id: str, chunk_id: str, session: AsyncSession = Depends(get_read_session)):
+    chunk = await session.get(Chunk, chunk_id)
+    if not chunk or chunk.plan_id != plan_id:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+    return await chunk_events(session, chunk_id)
+
+class ChunkBatchUpdate(ChunkUpdate):
+    id: str
+
+class ChunkBatch(BaseModel):
+    create: List[ChunkBase] = []
+    update: List[ChunkBatchUpdate] = []
+    delete: List[str] = []
+
+@app.patch("/plans/{plan_id}/chunks", response_model=PlanRead)
+async def batch_update_chunks(plan_id: str, batch: ChunkBatch, session: AsyncSession = Depends(get_async_session)):
+    # Creates, updates and deletes for one plan in a single transaction.
+    # Either the whole batch applies or none of it does; aggregates are folded
+    # in per chunk and the deadline is re-read at most once.
+    plan = await session.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    update_ids = [u.id for u in batch.update]
+    touched = update_ids + batch.delete
+    if len(set(touched)) != len(touched):
+        raise HTTPException(status_code=400, detail="Each chunk may appear only once per batch")
+
+    existing = {}
+    if touched:
+        existing = {
+            c.id: c for c in (await session.exec(
+                select(Chunk).where(Chunk.plan_id == plan_id, Chunk.id.in_(touched))
+            )).all()
+        }
+    missing = [chunk_id for chunk_id in touched if chunk_id not in existing]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Chunk not found: {', '.join(missing)}")
+
+    refresh_deadline = False
+    for update in batch.update:
+        chunk = existing[update.id]
+        before = ChunkState.of(chunk)
+        apply_chunk_update(session, chunk, update)
+        session.add(chunk)
+        refresh_deadline |= apply_chunk_change(plan, before, ChunkState.of(chunk))
+
+    for chunk_id in batch.delete:
+        chunk = existing[chunk_id]
+        await session.exec(delete(ChunkEvent).where(ChunkEvent.chunk_id == chunk_id))
+        await session.delete(chunk)
+        refresh_deadline |= apply_chunk_change(plan, ChunkState.of(chunk), None)
+
+    new_chunks = await schedule_new_chunks(session, [Chunk(**c.model_dump()) for c in batch.create])
+    for chunk in new_chunks:
+        chunk.plan_id = plan.id
+        session.add(chunk)
+        record_initial_history(session, chunk)
+        refresh_deadline |= apply_chunk_change(plan, None, ChunkState.of(chunk))
+
+    if refresh_deadline:
+        await refresh_plan_deadline(session, plan)
+    bump_plan_version(plan)
+    session.add(plan)
+    await session.commit()
+    publish_plan_changes(
+        "plan.updated", plan,
+        created=new_chunks, updated=[existing[u.id] for u in batch.update], deleted=batch.delete,
+    )
+    return plan_response(await load_plan(session, plan_id))
+
+class RescheduleRequest(BaseModel):
+    start: Optional[datetime] = None  # defaults to today
+    capacity_minutes: Optional[int] = Field(None, ge=1, le=24 * 60)  # per day, across all plans
+
+async def publish_reschedule(session: AsyncSession, changed: Dict[str, List[str]]):
+    # Moved chunks go out as chunk.updated deltas on each plan's feed
+    plan_ids = [plan_id for plan_id in changed if plan_id is not None]
+    if not plan_ids:
+        return
+    plans = (await session.exec(
+        select(Plan).where(Plan.id.in_(plan_ids))
+        .options(selectinload(Plan.chunks))
+        .execution_options(populate_existing=True)
+    )).all()
+    for plan in plans:
+        moved = set(changed[plan.id])
+        publish_plan_changes("plan.updated", plan, updated=[c for c in plan.chunks if c.id in moved])
+
+@app.post("/plans/{plan_id}/reschedule", response_model=PlanRead)
+async def reschedule_plan(plan_id: str, req: Optional[RescheduleRequest] = None, session: AsyncSession = Depends(get_async_session)):
+    # Re-plans this plan's open chunks around what the other plans have booked
+    req = req or RescheduleRequest()
+    if not await session.get(Plan, plan_id):
+        raise HTTPException(status_code=404, detail="Plan not found")
+    result = await reschedule(session, plan_id, req.start, req.capacity_minutes)
+    await session.commit()
+    await publish_reschedule(session, result.changed)
+    response = plan_response(await load_plan(session, plan_id))
+    response.headers["X-Late-Chunks"] = str(len(result.late))
+    return response
+
+@app.post("/schedule")
+async def reschedule_workspace(req: Optional[RescheduleRequest] = None, session: AsyncSession = Depends(get_async_session)):
+    # Re-plans every open chunk of every plan against one shared daily budget
+    req = req or RescheduleRequest()
+    result = await reschedule(session, None, req.start, req.capacity_minutes)
+    await session.commit()
+    await publish_reschedule(session, result.changed)
+    return {
+        "scheduled": result.scheduled,
+        "moved": sum(len(ids) for ids in result.changed.values()),
+        "plans": sorted(plan_id for plan_id in result.changed if plan_id is not None),
+        "late": result.late,
+    }
+
 class ApiKeyUpdate(BaseModel):
     key: str
 
@@ -233,6 +709,7 @@ class ApiKeyUpdate(BaseModel):
 def set_api_key(update: ApiKeyUpdate):
     # Update current process
     os.environ["GEMINI_API_KEY"] = update.key
+    set_default_api_key(update.key)
     
     # Update .env file
     env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
@@ -266,36 +743,128 @@ def set_api_key(update: ApiKeyUpdate):
         return {"status": "error", "message": str(e)}
 
 @app.delete("/plans/{plan_id}/chunks/{chunk_id}")
-def delete_chunk(plan_id: str, chunk_id: str, session: Session = Depends(get_session)):
-    plan = session.get(Plan, plan_id)
-    if not plan:
+async def delete_chunk(plan_id: str, chunk_id: str, session: AsyncSession = Depends(get_async_session)):
+    # One transaction: delete the chunk (scoped to the plan) and its events,
+    # then recompute the plan from the chunks left.
+    deleted = (await session.exec(
+        delete(Chunk)
+        .where(Chunk.id == chunk_id, Chunk.plan_id == plan_id)
+        .returning(Chunk.id)
+    )).first()
+    if deleted is None:
+        raise await chunk_not_found(session, plan_id)
+    await session.exec(delete(ChunkEvent).where(ChunkEvent.chunk_id == chunk_id))
+    plan = await recompute_plan(session, plan_id)
+    if plan is None:
         raise HTTPException(status_code=404, detail="Plan not found")
-    
-    chunk = session.get(Chunk, chunk_id)
-    if not chunk or chunk.plan_id != plan_id:
-        raise HTTPException(status_code=404, detail="Chunk not found")
-    
-    session.delete(chunk)
-    session.commit()
-    recalculate_plan_deadline(session, plan_id)
+    await session.commit()
+    publish_plan_changes("plan.updated", plan, deleted=[chunk_id])
     return {"message": "Chunk deleted"}
 
 @app.delete("/plans/{plan_id}")
-def delete_plan(plan_id: str, session: Session = Depends(get_session)):
-    plan = session.get(Plan, plan_id)
+async def delete_plan(plan_id: str, session: AsyncSession = Depends(get_async_session)):
+    plan = await session.get(Plan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
     # Cascade delete chunks (if not handled by DB FK)
-    # SQLModel doesn't auto-cascade python objects unless configured, but DB FK usually does if set.
-    # Manually deleting to be safe and explicit or relying on relationship
-    for chunk in plan.chunks:
-        session.delete(chunk)
+    # SQLite doesn't enforce FKs by default, so delete them explicitly in one
+    # statement rather than loading the relationship.
+    await session.exec(delete(ChunkEvent).where(ChunkEvent.chunk_id.in_(select(Chunk.id).where(Chunk.plan_id == plan_id))))
+    await session.exec(delete(Chunk).where(Chunk.plan_id == plan_id))
     
-    session.delete(plan)
-    session.commit()
+    await session.delete(plan)
+    await session.commit()
+    invalidate_plan_reads(plan_id)
+    broker.publish("plan.deleted", plan_id)
     return {"message": "Plan deleted"}
 
+@app.get("/occurrences")
+async def read_occurrences(
+    start: date,
+    end: date,
+    plan_id: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    # Every day each chunk is active on in [start, end] (inclusive), expanded
+    # on the server; chunks are listed once under "chunks".
+    if end < start:
+        raise HTTPException(status_code=400, detail="end is before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is longer than {MAX_RANGE_DAYS} days")
+
+    key = (start, end, plan_id)
+    body = occurrence_cache.get(key)
+    if body is None:
+        epoch = occurrence_cache.epoch
+        result = await occurrences_between(session, start, end, plan_id)
+        body = dumps({
+            "occurrences": result["occurrences"],
+            "chunks": {chunk_id: chunk_to_dict(chunk) for chunk_id, chunk in result["chunks"].items()},
+        })
+        occurrence_cache.set(key, body, epoch=epoch)
+    return Response(content=body, media_type="application/json")
+
+@app.get("/stats/cache")
+def cache_stats():
+    return {
+        "plan": plan_cache.stats(),
+        "plan_list": plan_list_cache.stats(),
+        "occurrences": occurrence_cache.stats(),
+        "ai": prompt_cache.stats(),
+    }
+
+@app.get("/stats/llm")
+def llm_stats():
+    # Per API key (hashed) and model: breaker state and rolling latency/errors
+    return {
+        "models": model_health.stats(),
+        "hedging": hedge_stats.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "coalesced": in_flight.coalesced,
+    }
+
+EVENT_KEEPALIVE_SECONDS = 15
+
+@app.get("/events")
+async def plan_events(
+    request: Request,
+    plan_id: Optional[str] = None,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    # Server-sent events with plan/chunk deltas from the write routes.
+    # Clients apply them locally instead of refetching /plans; on a "resync"
+    # event they refetch once and keep following the stream.
+    queue = broker.subscribe(last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] == RESYNC:
+                    yield format_sse(event)
+                    if not broker.is_subscribed(queue):
+                        break  # dropped for falling behind; EventSource reconnects
+                    continue
+                if plan_id and event["plan_id"] != plan_id:
+                    continue
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- Static File Serving (for Deployment) ---
 import os
 from fastapi.staticfiles import StaticFiles
@@ -0,0 +1,191 @@
+from datetime import datetime
+from typing import Callable, List, Tuple
+from app.database import engine as default_engine
+
+# Versioned schema migrations.
+# Each migration runs once, in order, and is recorded in schema_migrations, so
+# startup only reads that table instead of inspecting the schema every time.
+# Migrations are plain SQL against a Connection and must never be edited once
+# released: add a new version instead.
+
+def _baseline(conn):
+    # Schema as it was before migrations existed (SQLModel create_all output).
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS "plan" (
+            title VARCHAR NOT NULL,
+            description VARCHAR NOT NULL,
+            color VARCHAR NOT NULL,
+            created_at DATETIME NOT NULL,
+            deadline DATETIME,
+            id VARCHAR NOT NULL,
+            PRIMARY KEY (id)
+        )
+    """)
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS chunk (
+            title VARCHAR NOT NULL,
+            description VARCHAR,
+            status VARCHAR(11) NOT NULL,
+            estimated_hours FLOAT NOT NULL,
+            duration_minutes INTEGER NOT NULL,
+            frequency VARCHAR NOT NULL,
+            scheduled_date DATETIME,
+            deadline DATETIME,
+            history JSON,
+            id VARCHAR NOT NULL,
+            plan_id VARCHAR,
+            PRIMARY KEY (id),
+            FOREIGN KEY(plan_id) REFERENCES "plan" (id)
+        )
+    """)
+    # Databases created before the history column (scripts/add_history_column.py)
+    columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(chunk)")]
+    if "history" not in columns:
+        conn.exec_driver_sql("ALTER TABLE chunk ADD COLUMN history JSON")
+
+def _chunk_and_plan_indexes(conn):
+    # Chunks of a plan (recalculate_plan_deadline, selectinload(Plan.chunks))
+    # and max(deadline) per plan, answered from the index alone.
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_chunk_plan_id_deadline ON chunk (plan_id, deadline)")
+    # Per-plan status counts (GET /plans?include=summary)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_chunk_plan_id_status ON chunk (plan_id, status)")
+    # Cross-plan deadline scans (backfill, calendar ranges)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_chunk_deadline ON chunk (deadline)")
+    # Keyset pagination of GET /plans
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_plan_created_at_id ON "plan" (created_at, id)')
+
+def _plan_aggregates(conn):
+    for column, ddl in [
+        ("chunk_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("todo_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("in_progress_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("done_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("skipped_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("deferred_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("total_hours", "FLOAT NOT NULL DEFAULT 0"),
+        ("completed_hours", "FLOAT NOT NULL DEFAULT 0"),
+    ]:
+        conn.exec_driver_sql(f'ALTER TABLE "plan" ADD COLUMN {column} {ddl}')
+    # Backfill in one set-based pass; each subquery is an index range scan.
+    conn.exec_driver_sql("""
+        UPDATE "plan" SET
+            chunk_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id),
+            todo_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'TODO'),
+            in_progress_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'IN_PROGRESS'),
+            done_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'DONE'),
+            skipped_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'SKIPPED'),
+            deferred_count = (SELECT count(*) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'DEFERRED'),
+            total_hours = (SELECT coalesce(sum(estimated_hours), 0) FROM chunk WHERE chunk.plan_id = "plan".id),
+            completed_hours = (SELECT coalesce(sum(estimated_hours), 0) FROM chunk WHERE chunk.plan_id = "plan".id AND status = 'DONE')
+    """)
+
+def _plan_version(conn):
+    conn.exec_driver_sql('ALTER TABLE "plan" ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+def _ai_cache(conn):
+    # Content-addressed store for LLM answers (see app/ai_cache.py).
+    # Times are unix seconds so expiry and eviction are plain comparisons.
+    conn.exec_driver_sql("""
+        CREATE TABLE ai_cache (
+            key VARCHAR NOT NULL PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at FLOAT NOT NULL,
+            expires_at FLOAT NOT NULL
+        )
+    """)
+    conn.exec_driver_sql("CREATE INDEX ix_ai_cache_created_at ON ai_cache (created_at)")
+    conn.exec_driver_sql("CREATE INDEX ix_ai_cache_expires_at ON ai_cache (expires_at)")
+
+def _occurrence_indexes(conn):
+    # Calendar ranges (app/occurrences.py): chunks scheduled before the range
+    # end whose deadline isn't before its start, read from the index alone.
+    conn.exec_driver_sql("CREATE INDEX ix_chunk_schedule_window ON chunk (scheduled_date, deadline)")
+    # The few chunks with a day deferred, which can land outside that window
+    conn.exec_driver_sql(
+        "CREATE INDEX ix_chunk_deferred ON chunk (scheduled_date) "
+        "WHERE json_extract(history, '$.deferred') IS NOT NULL"
+    )
+
+def _chunk_events(conn):
+    # Append-only skip/defer/done log (app/chunk_events.py); chunk.history
+    # stays as the per-chunk view of it.
+    conn.exec_driver_sql("""
+        CREATE TABLE chunk_event (
+            id INTEGER NOT NULL PRIMARY KEY,
+            chunk_id VARCHAR NOT NULL,
+            kind VARCHAR(8) NOT NULL,
+            day VARCHAR(10) NOT NULL,
+            target VARCHAR(10),
+            created_at DATETIME NOT NULL,
+            FOREIGN KEY(chunk_id) REFERENCES chunk (id)
+        )
+    """)
+    # A chunk's log in order; one kind of event across chunks by day
+    conn.exec_driver_sql("CREATE INDEX ix_chunk_event_chunk_id ON chunk_event (chunk_id, id)")
+    conn.exec_driver_sql("CREATE INDEX ix_chunk_event_kind_day ON chunk_event (kind, day)")
+    # Existing history blobs become events in two set-based passes
+    now = datetime.now().isoformat(" ")
+    conn.exec_driver_sql("""
+        INSERT INTO chunk_event (chunk_id, kind, day, created_at)
+        SELECT chunk.id, 'skip', skipped.value, ?
+        FROM chunk, json_each(chunk.history, '$.skipped') AS skipped
+        WHERE json_type(chunk.history, '$.skipped') = 'array' AND skipped.type = 'text'
+        ORDER BY chunk.id, skipped.key
+    """, (now,))
+    conn.exec_driver_sql("""
+        INSERT INTO chunk_event (chunk_id, kind, day, target, created_at)
+        SELECT chunk.id, 'defer', deferred.key, deferred.value, ?
+        FROM chunk, json_each(chunk.history, '$.deferred') AS deferred
+        WHERE json_type(chunk.history, '$.deferred') = 'object' AND deferred.type = 'text'
+        ORDER BY chunk.id, deferred.id
+    """, (now,))
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "baseline", _baseline),
+    (2, "chunk and plan indexes", _chunk_and_plan_indexes),
+    (3, "plan aggregates", _plan_aggregates),
+    (4, "plan version", _plan_version),
+    (5, "ai response cache", _ai_cache),
+    (6, "occurrence indexes", _occurrence_indexes),
+    (7, "chunk events", _chunk_events),
+]
+
+def applied_migrations(engine=default_engine) -> List[int]:
+    with engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER NOT NULL PRIMARY KEY,
+                name VARCHAR NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        """)
+        return [row[0] for row in conn.exec_driver_sql("SELECT version FROM schema_migrations ORDER BY version")]
+
+def run_migrations(engine=default_engine) -> List[int]:
+    """
+    Applies pending migrations in version order, each in its own transaction.
+    Returns the versions that were applied by this call.
+    """
+    applied = set(applied_migrations(engine))
+    newly_applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            # pysqlite autocommits DDL; an explicit savepoint opens a real
+            # SQLite transaction so a failing migration leaves no partial schema.
+            conn.exec_driver_sql("SAVEPOINT migration")
+            migrate(conn)
+            conn.exec_driver_sql(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().isoformat(" ")),
+            )
+            conn.exec_driver_sql("RELEASE migration")
+        print(f"Applied migration {version}: {name}")
+        newly_applied.append(version)
+    return newly_applied
+
+if __name__ == "__main__":
+    applied = run_migrations()
+    if not applied:
+        print("Schema is up to date.")
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
 from uuid import uuid4
@@ -41,6 +41,30 @@ class Chunk(ChunkBase, table=True):
     def mark_done(self):
         self.status = ChunkStatus.DONE
 
+class ChunkEventKind(str, Enum):
+    SKIP = "skip"
+    UNSKIP = "unskip"
+    DEFER = "defer"    # with a target day; without one the day moves back
+    DONE = "done"
+    UNDONE = "undone"
+
+class ChunkEventCreate(SQLModel):
+    kind: ChunkEventKind
+    day: date
+    target: Optional[date] = None
+    # Overrides the status the event would set (skip: SKIPPED, unskip: TODO, done: DONE)
+    status: Optional[ChunkStatus] = None
+
+class ChunkEvent(SQLModel, table=True):
+    # Append-only log behind Chunk.history (see app/chunk_events.py)
+    __tablename__ = "chunk_event"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    chunk_id: str = Field(foreign_key="chunk.id")
+    kind: str
+    day: str  # YYYY-MM-DD, as in the history view
+    target: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+
 class PlanBase(SQLModel):
     title: str
     description: str = ""
@@ -48,14 +72,37 @@ class PlanBase(SQLModel):
     created_at: datetime = Field(default_factory=datetime.now)
     deadline: Optional[datetime] = None
 
-class Plan(PlanBase, table=True):
+class PlanAggregates(SQLModel):
+    # Maintained by app.aggregates in the same transaction as every chunk write
+    chunk_count: int = 0
+    todo_count: int = 0
+    in_progress_count: int = 0
+    done_count: int = 0
+    skipped_count: int = 0
+    deferred_count: int = 0
+    total_hours: float = 0.0
+    completed_hours: float = 0.0
+
+class Plan(PlanAggregates, PlanBase, table=True):
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    # Bumped by every plan or chunk write; the source of the plan's ETag
+    version: int = 1
     chunks: List["Chunk"] = Relationship(back_populates="plan", sa_relationship_kwargs={"cascade": "all, delete"})
 
-class PlanRead(PlanBase):
+class PlanRead(PlanAggregates, PlanBase):
     id: str
+    version: int = 1
     chunks: List[Chunk] = []
 
+class PlanMeta(PlanBase):
+    # Plan row only (GET /plans?include=none)
+    id: str
+    version: int = 1
+
+class PlanSummary(PlanAggregates, PlanMeta):
+    # Plan row plus its stored aggregates (GET /plans?include=summary)
+    pass
+
 class PlanCreate(PlanBase):
     pass
 
@@ -0,0 +1,132 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlmodel import select, and_, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Chunk, ChunkStatus, Frequency
+
+# Recurring chunk occurrences for a date range.
+# Same rules as the client's isChunkActiveOnDate (PlanManager.tsx): a chunk
+# recurs from its scheduled day up to its deadline day (daily, every 7 days,
+# or on the same day of the month), history.deferred moves single days
+# ({from: to}) and history.skipped marks days as skipped. Dates are generated
+# arithmetically per chunk instead of testing every chunk on every day, and
+# the candidate chunks come from ix_chunk_schedule_window (scheduled_date,
+# deadline) plus the partial ix_chunk_deferred for chunks moved into range.
+
+MAX_RANGE_DAYS = 366
+
+# Must match the partial index predicate word for word (a bound "$.deferred"
+# parameter wouldn't) for SQLite to use ix_chunk_deferred
+HAS_DEFERRALS = text("json_extract(chunk.history, '$.deferred') IS NOT NULL")
+
+def _day(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _frequency(value) -> str:
+    return getattr(value, "value", value) or Frequency.ONCE.value
+
+def recurring_days(frequency: str, scheduled: date, start: date, end: date) -> Iterable[date]:
+    """Days in [start, end] on which a chunk first scheduled on scheduled recurs."""
+    if scheduled > end:
+        return
+    if frequency == Frequency.DAILY.value:
+        day = max(scheduled, start)
+        while day <= end:
+            yield day
+            day += timedelta(days=1)
+    elif frequency == Frequency.WEEKLY.value:
+        day = scheduled
+        if day < start:
+            day += timedelta(days=-(-(start - day).days // 7) * 7)
+        while day <= end:
+            yield day
+            day += timedelta(days=7)
+    elif frequency == Frequency.MONTHLY.value:
+        year, month = (start.year, start.month) if scheduled < start else (scheduled.year, scheduled.month)
+        while (year, month) <= (end.year, end.month):
+            try:
+                day = date(year, month, scheduled.day)
+            except ValueError:
+                day = None  # no such day this month (e.g. the 31st)
+            if day is not None and scheduled <= day and start <= day <= end:
+                yield day
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    elif start <= scheduled:
+        yield scheduled
+
+def expand(chunk, start: date, end: date) -> List[Dict[str, Any]]:
+    """Occurrences of one chunk in [start, end], each {"date", "status", "chunk_id", "plan_id"}."""
+    scheduled = _day(chunk.scheduled_date)
+    if scheduled is None:
+        return []
+    deadline = _day(chunk.deadline)
+    history = chunk.history or {}
+    deferred = history.get("deferred") or {}
+    skipped = set(history.get("skipped") or ())
+    frequency = _frequency(chunk.frequency)
+    status = getattr(chunk.status, "value", chunk.status)
+
+    last = min(end, deadline) if deadline else end
+    days = set(recurring_days(frequency, scheduled, start, last)) if last >= start else set()
+    # Deferring moves one day; a day something was moved onto always counts
+    days -= {date.fromisoformat(d) for d in deferred if _is_iso(d)}
+    days |= {
+        date.fromisoformat(d) for d in deferred.values()
+        if _is_iso(d) and start.isoformat() <= d <= end.isoformat()
+    }
+
+    occurrences = []
+    for day in sorted(days):
+        iso = day.isoformat()
+        if iso in skipped:
+            day_status = ChunkStatus.SKIPPED.value
+        elif frequency != Frequency.ONCE.value and day > scheduled:
+            # Later instances of a recurring chunk start fresh
+            day_status = ChunkStatus.TODO.value
+        else:
+            day_status = status
+        occurrences.append({"date": iso, "status": day_status, "chunk_id": chunk.id, "plan_id": chunk.plan_id})
+    return occurrences
+
+def _is_iso(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+async def load_candidates(session: AsyncSession, start: date, end: date, plan_id: Optional[str] = None) -> List[Chunk]:
+    """Chunks that can have an occurrence in [start, end]."""
+    # Stored deadlines carry a time of day; anything on the start day counts
+    window = and_(
+        Chunk.scheduled_date < datetime.combine(end + timedelta(days=1), time()),
+        or_(Chunk.deadline.is_(None), Chunk.deadline >= datetime.combine(start, time())),
+    )
+    queries = [select(Chunk).where(window), select(Chunk).where(HAS_DEFERRALS, Chunk.scheduled_date.is_not(None))]
+    found: Dict[str, Chunk] = {}
+    for query in queries:
+        if plan_id is not None:
+            query = query.where(Chunk.plan_id == plan_id)
+        for chunk in (await session.exec(query)).all():
+            found[chunk.id] = chunk
+    return list(found.values())
+
+async def occurrences_between(session: AsyncSession, start: date, end: date, plan_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    {"occurrences": [...], "chunks": {id: chunk}} for [start, end], ordered
+    by date. Each chunk is sent once however many days it occurs on.
+    """
+    occurrences = []
+    chunks = {}
+    for chunk in await load_candidates(session, start, end, plan_id):
+        found = expand(chunk, start, end)
+        if found:
+            occurrences.extend(found)
+            chunks[chunk.id] = chunk
+    occurrences.sort(key=lambda o: (o["date"], o["plan_id"] or "", o["chunk_id"]))
+    return {"occurrences": occurrences, "chunks": chunks}
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Keyset pagination over (created_at, id).
+# The cursor is an opaque url-safe token holding the sort key of the last row
+# on the previous page, so the next page is a simple indexed range scan
+# instead of an OFFSET that gets slower the deeper you go.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, plan_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), plan_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, plan_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(plan_id)
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """
+    Returns the cursor for the page after `rows`, or None on the last page.
+    Callers fetch limit + 1 rows so the extra row tells us another page exists.
+    """
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,249 @@
+import heapq
+import math
+import os
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+import numpy as np
+from sqlalchemy import bindparam, text, update
+from sqlmodel import select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Chunk, ChunkStatus
+from app.deadlines import FREQUENCY_DAYS
+
+# Capacity-aware scheduling across all plans.
+# Every open chunk needs sessions = ceil(hours / session length) sessions,
+# spaced by its frequency. Each day has a budget of minutes shared by every
+# plan. Tasks sit in a heap ordered by deadline slack (days to spare if the
+# remaining sessions ran back to back from the next free day); the task with
+# the least slack books its next session in the first day with room, then goes
+# back in the heap. Chunks without a deadline come after, in input order.
+# Sessions are booked up to HORIZON_DAYS ahead; a chunk's scheduled_date is the
+# day of its first session.
+
+DAILY_CAPACITY_MINUTES = int(os.getenv("PLANOUT_DAILY_CAPACITY_MINUTES", "240"))
+HORIZON_DAYS = int(os.getenv("PLANOUT_SCHEDULE_HORIZON_DAYS", "366"))
+
+# Statuses that still need time on the calendar
+OPEN_STATUSES = (ChunkStatus.TODO, ChunkStatus.IN_PROGRESS, ChunkStatus.DEFERRED)
+
+class Task(NamedTuple):
+    minutes: int                    # length of one session
+    sessions: int                   # sessions to place
+    spacing: int = 1                # days from one session to the next
+    deadline: Optional[int] = None  # last allowed day, as an offset from day 0
+    earliest: int = 0               # first allowed day
+
+class Placement(NamedTuple):
+    first: int  # day of the first session
+    last: int   # day of the last session booked (within the horizon)
+    late: bool  # the sessions run past the deadline
+
+class DayBudget:
+    """
+    Minutes left per day from day 0. Days that can't fit even the shortest
+    session are closed and skipped through a path-compressed next pointer, so
+    finding room stays cheap as the calendar fills up.
+    """
+    def __init__(self, capacity: int, days: int, min_minutes: int = 1, booked: Optional[np.ndarray] = None):
+        self.capacity = capacity
+        self.days = days
+        self.min_minutes = max(1, min(min_minutes, capacity))
+        self.remaining = [capacity] * days
+        if booked is not None:
+            self.remaining = (capacity - booked[:days]).tolist()
+        self._next = list(range(days + 1))  # days[d] open -> d, else a later day
+        for day, left in enumerate(self.remaining):
+            if left < self.min_minutes:
+                self._next[day] = day + 1
+
+    def _open(self, day: int) -> int:
+        root = day
+        while self._next[root] != root:
+            root = self._next[root]
+        while self._next[day] != root:
+            self._next[day], day = root, self._next[day]
+        return root
+
+    def first_fit(self, day: int, minutes: int) -> int:
+        """First day >= day with room for minutes; days past the horizon always fit."""
+        if minutes > self.capacity:
+            # Longer than a whole day: it gets an untouched day to itself
+            minutes = self.capacity
+        while day < self.days:
+            day = self._open(day)
+            if day >= self.days or self.remaining[day] >= minutes:
+                break
+            day += 1
+        return day
+
+    def book(self, day: int, minutes: int):
+        if day >= self.days:
+            return
+        self.remaining[day] -= minutes
+        if self.remaining[day] < self.min_minutes:
+            self._next[day] = day + 1
+
+def schedule(tasks: Sequence[Task], capacity: int, horizon: int = HORIZON_DAYS, booked: Optional[np.ndarray] = None) -> List[Placement]:
+    """
+    Places every session of every task; booked holds minutes already taken
+    per day (other plans' chunks). Returns one Placement per task, in order.
+    """
+    budget = DayBudget(capacity, horizon, min(t.minutes for t in tasks) if tasks else 1, booked)
+    first: List[Optional[int]] = [None] * len(tasks)
+    last = [0] * len(tasks)
+    heap = []
+    for index, task in enumerate(tasks):
+        if task.sessions > 0:
+            heap.append((_slack(task, task.earliest, task.sessions), index, task.earliest, task.sessions))
+        else:
+            first[index] = last[index] = task.earliest
+    heapq.heapify(heap)
+
+    while heap:
+        _, index, day, left = heapq.heappop(heap)
+        task = tasks[index]
+        day = budget.first_fit(day, task.minutes)
+        budget.book(day, task.minutes)
+        if first[index] is None:
+            first[index] = day
+        last[index] = day
+        left -= 1
+        # Sessions past the horizon don't affect anything that is stored
+        if left and day < horizon:
+            next_day = day + task.spacing
+            heapq.heappush(heap, (_slack(task, next_day, left), index, next_day, left))
+        elif left:
+            last[index] = day + left * task.spacing
+
+    return [
+        Placement(first[i], last[i], task.deadline is not None and last[i] > task.deadline)
+        for i, task in enumerate(tasks)
+    ]
+
+def _slack(task: Task, day: int, sessions_left: int) -> float:
+    if task.deadline is None:
+        return math.inf
+    return task.deadline - (day + (sessions_left - 1) * task.spacing)
+
+def chunk_task(chunk, day0: datetime, earliest: int = 0) -> Task:
+    """A Task for a chunk (or a row with the same columns), days counted from day0."""
+    minutes = chunk.duration_minutes if chunk.duration_minutes and chunk.duration_minutes > 0 else 60
+    sessions = max(1, math.ceil(round((chunk.estimated_hours or 0) * 60 / minutes, 6)))
+    deadline = None
+    if chunk.deadline:
+        # Stored datetimes are naive; drop the offset of one that came straight from JSON
+        deadline = (chunk.deadline.replace(tzinfo=None) - day0).days
+    return Task(minutes, sessions, _spacing(chunk.frequency), deadline, earliest)
+
+def _spacing(frequency) -> int:
+    return FREQUENCY_DAYS.get(getattr(frequency, "value", frequency), 1)
+
+def booked_minutes(chunks: Iterable, day0: datetime, horizon: int = HORIZON_DAYS) -> np.ndarray:
+    """Minutes per day taken by chunks that keep their scheduled_date."""
+    chunks = list(chunks)
+    if not chunks:
+        return np.zeros(horizon, dtype=np.int64)
+    tasks = [chunk_task(c, day0) for c in chunks]
+    starts = np.array([(c.scheduled_date - day0).days for c in chunks], dtype=np.int64)
+    sessions = np.minimum([t.sessions for t in tasks], horizon)
+    # One entry per session: start + k * spacing for k in 0..sessions-1
+    k = np.arange(sessions.sum()) - np.repeat(np.cumsum(sessions) - sessions, sessions)
+    days = np.repeat(starts, sessions) + k * np.repeat([t.spacing for t in tasks], sessions)
+    minutes = np.repeat([t.minutes for t in tasks], sessions)
+    inside = (days >= 0) & (days < horizon)
+    return np.bincount(days[inside], weights=minutes[inside], minlength=horizon).astype(np.int64)
+
+def start_of_day(moment: Optional[datetime] = None) -> datetime:
+    return datetime.combine((moment or datetime.now()).date(), time())
+
+async def _fixed_load(session: AsyncSession, day0: datetime, exclude_plan: Optional[str] = None, horizon: int = HORIZON_DAYS) -> np.ndarray:
+    # Recurring chunks that started up to a horizon ago can still have sessions ahead
+    query = select(
+        Chunk.id, Chunk.estimated_hours, Chunk.duration_minutes, Chunk.frequency,
+        Chunk.scheduled_date, Chunk.deadline,
+    ).where(
+        Chunk.status.in_(OPEN_STATUSES),
+        Chunk.scheduled_date >= day0 - timedelta(days=horizon),
+        Chunk.scheduled_date < day0 + timedelta(days=horizon),
+    )
+    if exclude_plan is not None:
+        query = query.where(or_(Chunk.plan_id != exclude_plan, Chunk.plan_id.is_(None)))
+    return booked_minutes((await session.exec(query)).all(), day0, horizon)
+
+async def schedule_new_chunks(session: AsyncSession, chunks: List[Chunk], start: Optional[datetime] = None, capacity: Optional[int] = None) -> List[Chunk]:
+    """Sets scheduled_date on chunks about to be added, around everything already on the calendar."""
+    if not chunks:
+        return chunks
+    day0 = start_of_day(start)
+    booked = await _fixed_load(session, day0)
+    placements = schedule([chunk_task(c, day0) for c in chunks], capacity or DAILY_CAPACITY_MINUTES, booked=booked)
+    for chunk, placement in zip(chunks, placements):
+        chunk.scheduled_date = day0 + timedelta(days=placement.first)
+    return chunks
+
+class RescheduleResult(NamedTuple):
+    changed: Dict[str, List[str]]  # plan id -> ids of chunks that moved
+    late: List[str]                # chunk ids that can't finish by their deadline
+    scheduled: int
+
+def _has_started(row, cutoff: datetime) -> bool:
+    # In progress, or recurring with occurrences already behind it
+    if row.scheduled_date is None or row.scheduled_date >= cutoff:
+        return False
+    return row.status == ChunkStatus.IN_PROGRESS or getattr(row.frequency, "value", row.frequency) != "Once"
+
+_move_chunk = (
+    update(Chunk.__table__)
+    .where(Chunk.__table__.c.id == bindparam("b_id"))
+    .values(scheduled_date=bindparam("b_date"))
+)
+
+async def reschedule(session: AsyncSession, plan_id: Optional[str] = None, start: Optional[datetime] = None, capacity: Optional[int] = None) -> RescheduleResult:
+    """
+    Re-plans the open chunks of one plan (around every other plan's calendar)
+    or, with plan_id None, of the whole workspace. Chunks that started before
+    today (in progress, or recurring) stay put. Moved chunks are written
+    with one executemany UPDATE and their plans' versions bumped; the caller
+    commits.
+    """
+    day0 = start_of_day(start)
+    query = select(
+        Chunk.id, Chunk.plan_id, Chunk.status, Chunk.estimated_hours, Chunk.duration_minutes,
+        Chunk.frequency, Chunk.scheduled_date, Chunk.deadline,
+    ).where(Chunk.status.in_(OPEN_STATUSES))
+    if plan_id is not None:
+        query = query.where(Chunk.plan_id == plan_id)
+    rows = (await session.exec(query)).all()
+    # Chunks already under way keep their date (for a recurring chunk it anchors
+    # every occurrence and the skip/defer days recorded against them); their
+    # remaining sessions are booked like another plan's.
+    cutoff = min(day0, start_of_day())
+    started = [r for r in rows if _has_started(r, cutoff)]
+    rows = [r for r in rows if not _has_started(r, cutoff)]
+    # Keep the current order among equals: by plan, then by date already set
+    rows.sort(key=lambda r: (r.scheduled_date is None, r.scheduled_date or day0, r.plan_id or "", r.id))
+
+    booked = booked_minutes(started, day0)
+    if plan_id is not None:
+        booked += await _fixed_load(session, day0, exclude_plan=plan_id)
+    placements = schedule([chunk_task(r, day0) for r in rows], capacity or DAILY_CAPACITY_MINUTES, booked=booked)
+
+    moves = []
+    changed: Dict[str, List[str]] = {}
+    late = []
+    for row, placement in zip(rows, placements):
+        date = day0 + timedelta(days=placement.first)
+        if placement.late:
+            late.append(row.id)
+        if row.scheduled_date != date:
+            moves.append({"b_id": row.id, "b_date": date})
+            changed.setdefault(row.plan_id, []).append(row.id)
+    if moves:
+        await session.exec(_move_chunk, params=moves)
+        plan_ids = [p for p in changed if p is not None]
+        if plan_ids:
+            await session.exec(
+                text('UPDATE "plan" SET version = version + 1 WHERE id IN :ids').bindparams(bindparam("ids", expanding=True)),
+                params={"ids": plan_ids},
+            )
+    return RescheduleResult(changed, late, len(rows))
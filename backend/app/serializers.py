@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple, get_args
+from app.models import Chunk, PlanRead, PlanMeta, PlanSummary
+
+try:
+    import orjson
+except ImportError:  # optional: plain json is used when it isn't installed
+    orjson = None
+
+# Fast JSON path for plan payloads.
+# Routes with response_model=PlanRead build a PlanRead, re-validate every chunk
+# (history dict included) and run jsonable_encoder before json.dumps. Here each
+# model's field list is compiled once, values are read straight from the ORM
+# instance dict, and orjson encodes datetimes and enums natively. The wire
+# format matches the pydantic path (tests/test_serializers.py).
+
+FAST_JSON = os.getenv("PLANOUT_FAST_JSON", "").lower() in ("1", "true", "yes")
+
+def _fields(model, exclude: Tuple[str, ...] = ()) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    names = tuple(name for name in model.model_fields if name not in exclude)
+    # pydantic coerces ints to float for float fields; keep that on the wire
+    floats = tuple(
+        name for name in names
+        if float in (get_args(model.model_fields[name].annotation) or (model.model_fields[name].annotation,))
+    )
+    return names, floats
+
+CHUNK_FIELDS = _fields(Chunk)
+PLAN_READ_FIELDS = _fields(PlanRead, exclude=("chunks",))
+PLAN_META_FIELDS = _fields(PlanMeta)
+PLAN_SUMMARY_FIELDS = _fields(PlanSummary)
+
+def _serialize(obj, fields) -> Dict[str, Any]:
+    names, floats = fields
+    values = obj.__dict__
+    try:
+        out = {name: values[name] for name in names}
+    except KeyError:  # expired or deferred attributes: let the ORM load them
+        out = {name: getattr(obj, name) for name in names}
+    for name in floats:
+        if type(out[name]) is int:
+            out[name] = float(out[name])
+    return out
+
+def chunk_to_dict(chunk) -> Dict[str, Any]:
+    return _serialize(chunk, CHUNK_FIELDS)
+
+def plan_to_dict(plan, include: str = "chunks") -> Dict[str, Any]:
+    """
+    Same shape as PlanRead (include="chunks"), PlanSummary ("summary") or
+    PlanMeta ("none") for a Plan row. Values are left as Python objects;
+    dumps() knows how to encode them.
+    """
+    if include == "none":
+        return _serialize(plan, PLAN_META_FIELDS)
+    if include == "summary":
+        return _serialize(plan, PLAN_SUMMARY_FIELDS)
+    out = _serialize(plan, PLAN_READ_FIELDS)
+    out["chunks"] = [_serialize(chunk, CHUNK_FIELDS) for chunk in plan.chunks]
+    return out
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        # pydantic writes UTC as "Z"
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode()
+
+def serialize_plan(plan, include: str = "chunks", fast: Optional[bool] = None) -> bytes:
+    if FAST_JSON if fast is None else fast:
+        return dumps(plan_to_dict(plan, include))
+    model = {"chunks": PlanRead, "summary": PlanSummary, "none": PlanMeta}[include]
+    return model.model_validate(plan).model_dump_json().encode()
+
+def serialize_plans(plans: list, include: str = "chunks", fast: Optional[bool] = None) -> bytes:
+    if FAST_JSON if fast is None else fast:
+        return dumps([plan_to_dict(plan, include) for plan in plans])
+    return b"[" + b",".join(serialize_plan(plan, include, fast=False) for plan in plans) + b"]"
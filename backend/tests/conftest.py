@@ -0,0 +1,18 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app.ai_cache import PromptCache, prompt_cache
+from app.migrations import run_migrations
+
+@pytest.fixture(autouse=True)
+def isolated_prompt_cache(tmp_path):
+    # Each test gets an empty AI answer cache, so a Gemini answer cached in the
+    # dev database by an earlier run can't stand in for the call under test.
+    path = tmp_path / "prompt_cache.db"
+    run_migrations(create_engine(f"sqlite:///{path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    cache = PromptCache(engine, engine, ttl=prompt_cache.ttl, max_entries=prompt_cache.max_entries)
+    with patch("app.gemini.prompt_cache", cache), patch("app.main.prompt_cache", cache):
+        yield cache
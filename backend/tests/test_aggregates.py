@@ -0,0 +1,105 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database import async_engine
+from app.models import Plan, ChunkStatus
+from app.aggregates import ChunkState, apply_chunk_change
+
+client = TestClient(app)
+
+def test_apply_chunk_change_deltas():
+    plan = Plan(title="Aggregates")
+    early = ChunkState(ChunkStatus.TODO, 2.0, datetime(2030, 1, 1))
+    late = ChunkState(ChunkStatus.TODO, 3.0, datetime(2030, 6, 1))
+
+    assert not apply_chunk_change(plan, None, early)
+    assert not apply_chunk_change(plan, None, late)
+    assert (plan.chunk_count, plan.todo_count, plan.total_hours) == (2, 2, 5.0)
+    assert plan.deadline == datetime(2030, 6, 1)
+
+    done = late._replace(status=ChunkStatus.DONE)
+    assert not apply_chunk_change(plan, late, done)
+    assert (plan.todo_count, plan.done_count, plan.completed_hours) == (1, 1, 3.0)
+
+    # Removing the chunk that holds the latest deadline needs a re-read
+    assert apply_chunk_change(plan, done, None)
+    assert (plan.chunk_count, plan.done_count, plan.total_hours, plan.completed_hours) == (1, 0, 2.0, 0.0)
+
+def test_plan_aggregates_follow_chunk_writes():
+    plan_id = client.post("/plans", json={"title": "Progress"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "A", "estimated_hours": 2, "frequency": "Once", "deadline": "2030-01-01"},
+        {"title": "B", "estimated_hours": 3, "frequency": "Once", "deadline": "2030-06-01"},
+    ])
+    plan = client.get(f"/plans/{plan_id}").json()
+    assert plan["chunk_count"] == 2
+    assert plan["todo_count"] == 2
+    assert plan["total_hours"] == 5.0
+    assert plan["deadline"].startswith("2030-06-01")
+
+    a, b = sorted(plan["chunks"], key=lambda c: c["title"])
+    client.patch(f"/plans/{plan_id}/chunks/{b['id']}", json={"status": "DONE", "deadline": "2029-01-01T00:00:00"})
+    plan = client.get(f"/plans/{plan_id}").json()
+    assert (plan["todo_count"], plan["done_count"], plan["completed_hours"]) == (1, 1, 3.0)
+    # B no longer holds the latest deadline, so it is re-read from the index
+    assert plan["deadline"].startswith("2030-01-01")
+
+    client.delete(f"/plans/{plan_id}/chunks/{a['id']}")
+    plan = client.get(f"/plans/{plan_id}").json()
+    assert (plan["chunk_count"], plan["todo_count"], plan["total_hours"]) == (1, 0, 3.0)
+    assert plan["deadline"].startswith("2029-01-01")
+
+def test_utc_deadline_on_plan_with_deadline():
+    # Browsers send toISOString(), which the plan's stored (naive) deadline must compare with
+    plan_id = client.post("/plans", json={"title": "UTC"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once", "deadline": "2030-01-01"}])
+
+    response = client.post(f"/plans/{plan_id}/chunks", json=[{"title": "B", "frequency": "Once", "deadline": "2031-01-01T00:00:00Z"}])
+    assert response.status_code == 200
+    assert response.json()["deadline"].startswith("2031-01-01")
+
+    b = next(c for c in response.json()["chunks"] if c["title"] == "B")
+    response = client.patch(f"/plans/{plan_id}/chunks", json={"update": [{"id": b["id"], "deadline": "2032-01-01T00:00:00.000Z"}]})
+    assert response.status_code == 200
+    assert response.json()["deadline"].startswith("2032-01-01")
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+def test_chunk_write_statement_budget():
+    plan_id = client.post("/plans", json={"title": "Budget"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "A", "estimated_hours": 2, "deadline": "2030-01-01"},
+        {"title": "B", "estimated_hours": 3, "deadline": "2030-06-01"},
+    ])
+    a, b = sorted(client.get(f"/plans/{plan_id}").json()["chunks"], key=lambda c: c["title"])
+
+    # PATCH: the chunk UPDATE ... RETURNING and the plan recompute
+    with StatementCounter(async_engine.sync_engine) as counter:
+        response = client.patch(f"/plans/{plan_id}/chunks/{b['id']}", json={"status": "DONE", "deadline": "2029-01-01T00:00:00"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "DONE"
+    assert len(counter.statements) == 2, counter.statements
+
+    # DELETE: the chunk, its events and the plan recompute
+    with StatementCounter(async_engine.sync_engine) as counter:
+        assert client.delete(f"/plans/{plan_id}/chunks/{a['id']}").status_code == 200
+    assert len(counter.statements) == 3, counter.statements
+
+    plan = client.get(f"/plans/{plan_id}").json()
+    assert (plan["chunk_count"], plan["done_count"], plan["total_hours"], plan["completed_hours"]) == (1, 1, 3.0, 3.0)
+    assert plan["deadline"].startswith("2029-01-01")
+    assert client.patch(f"/plans/{plan_id}/chunks/{a['id']}", json={"status": "DONE"}).status_code == 404
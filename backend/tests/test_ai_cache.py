@@ -0,0 +1,64 @@
+import asyncio
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.ai_cache import PromptCache, prompt_key
+from app.migrations import run_migrations
+from app import gemini
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _cache(tmp_path, **kwargs):
+    path = tmp_path / "ai_cache.db"
+    run_migrations(create_engine(f"sqlite:///{path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    return PromptCache(engine, engine, **kwargs)
+
+def test_prompt_key_normalizes_whitespace():
+    models = ["gemini-2.5-flash"]
+    assert prompt_key("  Plan:\n  Learn   Go ", models) == prompt_key("Plan: Learn Go", models)
+    assert prompt_key("Plan: Learn Go", models) != prompt_key("Plan: Learn Go", ["other-model"])
+
+def test_prompt_cache_ttl_and_size_bound(tmp_path):
+    clock = FakeClock()
+    cache = _cache(tmp_path, ttl=60, max_entries=2, clock=clock)
+
+    async def run():
+        await cache.set("a", "[1]")
+        clock.now += 1
+        await cache.set("b", "[2]")
+        clock.now += 1
+        await cache.set("c", "[3]")  # evicts a, the oldest
+        assert await cache.get("a") is None
+        assert await cache.get("c") == "[3]"
+        clock.now += 60
+        assert await cache.get("c") is None
+
+    asyncio.run(run())
+    assert cache.stats()["hits"] == 1
+
+def test_identical_prompts_skip_gemini(tmp_path):
+    cache = _cache(tmp_path, ttl=60, max_entries=10)
+    calls = []
+
+    async def fake_generate(prompt, api_key=None, **kwargs):
+        calls.append(prompt)
+        return '```json\n{"description": "Cached", "duration_minutes": 45, "frequency": "Weekly"}\n```'
+
+    async def run():
+        first = await gemini.generate_chunk_details("Write tests", api_key="k")
+        second = await gemini.generate_chunk_details("Write tests", api_key="k")
+        fresh = await gemini.generate_chunk_details("Write tests", api_key="k", use_cache=False)
+        return first, second, fresh
+
+    with patch("app.gemini.prompt_cache", cache), patch("app.gemini._generate_with_retry", fake_generate):
+        first, second, fresh = asyncio.run(run())
+
+    assert first == second == fresh
+    assert first["description"] == "Cached"
+    assert len(calls) == 2
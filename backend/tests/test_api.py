@@ -35,3 +35,15 @@ def test_auto_chunk_and_schedule():
     # 3. Verify Persistence
     get_res = client.get(f"/plans/{plan_id}")
     assert len(get_res.json()["chunks"]) >= 2
+
+def test_delete_chunk_and_plan():
+    plan_id = client.post("/plans", json={"title": "Delete Me", "description": "Step 1: A. Step 2: B."}).json()["id"]
+    chunks = client.post(f"/plans/{plan_id}/breakdown").json()["chunks"]
+
+    res = client.delete(f"/plans/{plan_id}/chunks/{chunks[0]['id']}")
+    assert res.status_code == 200
+    assert len(client.get(f"/plans/{plan_id}").json()["chunks"]) == len(chunks) - 1
+
+    assert client.delete(f"/plans/{plan_id}").status_code == 200
+    assert client.get(f"/plans/{plan_id}").status_code == 404
+    assert client.patch(f"/plans/{plan_id}/chunks/{chunks[1]['id']}", json={"status": "DONE"}).status_code == 404
@@ -0,0 +1,47 @@
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlmodel import Session
+from app.migrations import run_migrations
+from app.models import Plan, Chunk, Frequency
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../scripts")))
+import backfill_deadlines as backfill
+
+def _seed(engine, n):
+    with Session(engine) as session:
+        session.add(Plan(id="p1", title="Plan"))
+        for i in range(n):
+            session.add(Chunk(
+                id=f"{i % 16:x}{i:07d}", plan_id="p1", title="t", estimated_hours=10,
+                duration_minutes=60, frequency=Frequency.DAILY, scheduled_date=datetime(2025, 1, 1),
+            ))
+        session.commit()
+
+def test_key_ranges_cover_id_space():
+    assert backfill.key_ranges(1) == [(None, None)]
+    ranges = backfill.key_ranges(4)
+    assert ranges == [(None, "4"), ("4", "8"), ("8", "c"), ("c", None)]
+
+def test_backfill_resumes_from_checkpoint(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    run_migrations(engine)
+    _seed(engine, 40)
+    checkpoint = str(tmp_path / "checkpoint")
+
+    # A first pass over part of the id space leaves its position behind
+    assert backfill.backfill_range((None, "8"), 7, checkpoint, engine=engine) == (24, 24)
+    assert backfill.load_checkpoint(checkpoint, (None, "8")).startswith("7")
+    assert backfill.load_checkpoint(checkpoint, (None, None)) is None
+
+    assert backfill.backfill_range((None, None), 7, None, engine=engine) == (16, 16)
+    assert backfill.update_plan_deadlines(engine) == 1
+    assert backfill.update_plan_deadlines(engine) == 0
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM chunk WHERE deadline IS NULL")).scalar() == 0
+        deadline, version = conn.execute(text('SELECT deadline, version FROM "plan"')).one()
+    assert datetime.fromisoformat(deadline) == datetime(2025, 1, 11)
+    # Every batch that touched the plan bumped its version, plus the final pass
+    assert version > 2
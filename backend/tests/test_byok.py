@@ -1,6 +1,7 @@
 import os
 import pytest
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
 # We need to mock the environment BEFORE importing api.main 
@@ -39,7 +40,7 @@ def test_suggest_with_header_key():
         mock_response.text = '{"description": "AI Generated", "duration_minutes": 45, "frequency": "Weekly"}'
         
         mock_model_instance = MockModel.return_value
-        mock_model_instance.generate_content.return_value = mock_response
+        mock_model_instance.generate_content_async = AsyncMock(return_value=mock_response)
 
         response = client.post(
             "/chunks/suggest_details", 
@@ -48,5 +49,62 @@ def test_suggest_with_header_key():
         )
         
         assert response.status_code == 200
-        # Verify generate_content was called
-        assert mock_model_instance.generate_content.called
+        # Verify the async call was made with a client for the header key
+        assert mock_model_instance.generate_content_async.called
+        assert response.json()["description"] == "AI Generated"
+
+def test_client_pool_keeps_one_client_per_key():
+    from app.gemini import ClientPool
+    made = []
+    pool = ClientPool(maxsize=2, factory=lambda key: made.append(key) or object())
+
+    async def run():
+        a = pool.get("key-a")
+        assert pool.get("key-a") is a
+        assert pool.get("key-b") is not a
+        pool.get("key-c")  # evicts key-a, the least recently used
+        assert len(pool) == 2
+        pool.get("key-a")
+
+    asyncio.run(run())
+    assert made == ["key-a", "key-b", "key-c", "key-a"]
+
+    # A client is bound to the loop that made it; a new loop gets a new one
+    asyncio.run(run())
+    assert made.count("key-a") == 4
+
+def test_concurrent_requests_use_their_own_keys():
+    from app import gemini
+    seen = []
+
+    class FakeModel:
+        def __init__(self, name):
+            self._async_client = None
+
+        async def generate_content_async(self, prompt, generation_config=None):
+            await asyncio.sleep(0.01)
+            seen.append(self._async_client)
+            return MagicMock(text='{"description": "ok", "duration_minutes": 30, "frequency": "Once"}')
+
+    async def run():
+        return await asyncio.gather(*[
+            gemini.generate_chunk_details("Task", api_key=key, use_cache=False) for key in ["key-a", "key-b", "key-a"]
+        ])
+
+    with patch("app.gemini.genai.GenerativeModel", FakeModel), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: f"client:{key}")):
+        results = asyncio.run(run())
+
+    assert all(r["description"] == "ok" for r in results)
+    # The two identical key-a prompts share one upstream call
+    assert sorted(seen) == ["client:key-a", "client:key-b"]
+
+def test_model_without_client_override_fails_loudly():
+    from app import gemini
+
+    class NewSdkModel:
+        pass
+
+    # Never fall back to the process-wide client and its key
+    with pytest.raises(RuntimeError):
+        gemini._use_client(NewSdkModel(), "client:key-a")
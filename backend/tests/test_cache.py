@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.cache import TTLCache, plan_cache
+
+client = TestClient(app)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_lru_and_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_ttl_cache_ignores_reads_older_than_an_invalidation():
+    cache = TTLCache(maxsize=10, ttl=10)
+    epoch = cache.epoch
+    cache.invalidate("a")  # a write lands while the read is in flight
+    cache.set("a", "stale", epoch=epoch)
+    assert cache.get("a") is None
+
+def test_plan_reads_are_cached_and_invalidated():
+    plan_id = client.post("/plans", json={"title": "Cached"}).json()["id"]
+    client.get(f"/plans/{plan_id}")
+    hits = plan_cache.hits
+    first = client.get(f"/plans/{plan_id}")
+    assert plan_cache.hits == hits + 1
+
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once"}])
+    second = client.get(f"/plans/{plan_id}")
+    assert len(second.json()["chunks"]) == 1
+    assert second.headers["etag"] != first.headers["etag"]
+
+    client.delete(f"/plans/{plan_id}")
+    assert client.get(f"/plans/{plan_id}").status_code == 404
+
+def _listed_plans(**params):
+    # Every page, following X-Next-Cursor: the dev DB keeps plans from earlier runs
+    plans = {}
+    cursor = None
+    while True:
+        res = client.get("/plans", params={**params, "cursor": cursor} if cursor else params)
+        assert res.status_code == 200
+        plans.update((p["id"], p) for p in res.json())
+        cursor = res.headers.get("x-next-cursor")
+        if not cursor:
+            return plans
+
+def test_plan_list_cache_invalidation():
+    params = {"include": "summary", "limit": 200}
+    plan_id = client.post("/plans", json={"title": "Listed"}).json()["id"]
+    assert plan_id in _listed_plans(**params)
+
+    client.patch(f"/plans/{plan_id}", json={"title": "Renamed"})
+    assert _listed_plans(**params)[plan_id]["title"] == "Renamed"
+
+    # A new plan lands on the cached tail page
+    new_id = client.post("/plans", json={"title": "Newest"}).json()["id"]
+    assert new_id in _listed_plans(**params)
+
+    stats = client.get("/stats/cache").json()
+    assert {"hits", "misses", "evictions", "invalidations"} <= set(stats["plan_list"])
@@ -0,0 +1,65 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.main import app
+from app.chunk_events import history_events, materialize, shift_occurrences
+
+client = TestClient(app)
+
+def test_materialize_folds_events_into_compact_view():
+    view = materialize([
+        ("skip", "2030-01-02", None),
+        ("skip", "2030-01-02", None),
+        ("defer", "2030-01-03", "2030-01-05"),
+        ("done", "2030-01-01", None),
+        ("unskip", "2030-01-02", None),
+    ])
+    assert view == {"deferred": {"2030-01-03": "2030-01-05"}, "done": ["2030-01-01"]}
+    assert materialize([("defer", "2030-01-03", "2030-01-05"), ("defer", "2030-01-03", None)]) == {}
+
+def test_history_events_round_trip():
+    old = {"skipped": ["2030-01-01"], "deferred": {"2030-01-02": "2030-01-04"}}
+    new = {"skipped": ["2030-01-03"], "deferred": {"2030-01-02": "2030-01-06"}}
+    events = history_events(old, new)
+    assert materialize(history_events({}, old) + events) == new
+
+def test_shift_occurrences():
+    moment = datetime(2030, 1, 31)
+    assert shift_occurrences(moment, "Daily", 1) == datetime(2030, 2, 1)
+    assert shift_occurrences(moment, "Weekly", -1) == datetime(2030, 1, 24)
+    assert shift_occurrences(moment, "Monthly", 1) == datetime(2030, 2, 28)
+    assert shift_occurrences(moment, "Once", 1) == moment
+
+def test_append_events_endpoint():
+    plan_id = client.post("/plans", json={"title": "Events"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "Walk", "frequency": "Daily", "deadline": "2030-01-10T00:00:00"},
+    ])
+    chunk_id = client.get(f"/plans/{plan_id}").json()["chunks"][0]["id"]
+    url = f"/plans/{plan_id}/chunks/{chunk_id}/events"
+
+    chunk = client.post(url, json={"kind": "skip", "day": "2030-01-02"}).json()
+    assert chunk["status"] == "SKIPPED"
+    assert chunk["history"] == {"skipped": ["2030-01-02"]}
+    # The skipped session is added at the end
+    assert chunk["deadline"].startswith("2030-01-11")
+
+    chunk = client.post(url, json={"kind": "defer", "day": "2030-01-03", "target": "2030-01-04"}).json()
+    assert chunk["history"]["deferred"] == {"2030-01-03": "2030-01-04"}
+    chunk = client.post(url, json={"kind": "unskip", "day": "2030-01-02", "status": "IN_PROGRESS"}).json()
+    assert chunk["status"] == "IN_PROGRESS"
+    assert chunk["deadline"].startswith("2030-01-10")
+    assert "skipped" not in chunk["history"]
+
+    # Whole-dict PATCHes from older clients land in the log too
+    client.patch(f"/plans/{plan_id}/chunks/{chunk_id}", json={"history": {"skipped": ["2030-01-07"], "note": "x"}})
+    events = client.get(url).json()
+    assert [(e["kind"], e["day"]) for e in events] == [
+        ("skip", "2030-01-02"), ("defer", "2030-01-03"), ("unskip", "2030-01-02"),
+        ("skip", "2030-01-07"), ("defer", "2030-01-03"),
+    ]
+    assert client.get(f"/plans/{plan_id}").json()["chunks"][0]["history"] == {"skipped": ["2030-01-07"], "note": "x"}
+
+    assert client.post(url, json={"kind": "bogus", "day": "2030-01-01"}).status_code == 422
+    assert client.post(f"/plans/{plan_id}/chunks/missing/events", json={"kind": "skip", "day": "2030-01-01"}).status_code == 404
+    client.delete(f"/plans/{plan_id}")
+    assert client.get(url).status_code == 404
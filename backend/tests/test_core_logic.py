@@ -54,3 +54,17 @@ def test_schedule_chunks_cadence():
     assert scheduled[0].scheduled_date.date() == start_date.date()
     assert scheduled[1].scheduled_date.date() == (start_date + timedelta(days=1)).date()
     assert scheduled[2].scheduled_date.date() == (start_date + timedelta(days=2)).date()
+
+def test_suggest_tasks_local_is_deterministic_and_dated():
+    from app.logic import suggest_tasks_local
+    now = datetime(2030, 1, 1)
+    deadline = datetime(2030, 2, 1)
+    tasks = suggest_tasks_local("Guitar", "Step 1: Buy strings. Step 2: Practice chords daily 20 min", deadline=deadline, now=now)
+    assert tasks == suggest_tasks_local("Guitar", "Step 1: Buy strings. Step 2: Practice chords daily 20 min", deadline=deadline, now=now)
+    assert [(t["title"], t["frequency"], t["duration_minutes"]) for t in tasks] == [
+        ("Buy strings", "Once", 60),
+        ("Practice chords daily 20 min", "Daily", 20),
+    ]
+    assert all(t["deadline"] <= "2030-02-01" for t in tasks)
+    # No description: a generic outline/work/review scaffold
+    assert len(suggest_tasks_local("Guitar", "", now=now)) == 3
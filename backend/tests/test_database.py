@@ -0,0 +1,37 @@
+import os
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.database import StorageProfile, apply_storage_profile
+
+def _engine(tmp_path, profile, read_only=False):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    apply_storage_profile(engine, profile, read_only=read_only)
+    return engine
+
+def test_storage_profile_pragmas(tmp_path):
+    engine = _engine(tmp_path, StorageProfile())
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+
+def test_storage_profile_from_env():
+    with patch.dict(os.environ, {"PLANOUT_SQLITE_BUSY_TIMEOUT": "250", "PLANOUT_SQLITE_JOURNAL_MODE": "DELETE"}):
+        profile = StorageProfile.from_env()
+    assert profile.busy_timeout == 250
+    assert profile.journal_mode == "DELETE"
+    assert profile.synchronous == "NORMAL"
+
+def test_read_only_connections_reject_writes(tmp_path):
+    writer = _engine(tmp_path, StorageProfile())
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    reader = _engine(tmp_path, StorageProfile(), read_only=True)
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (1)"))
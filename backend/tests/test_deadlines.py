@@ -0,0 +1,31 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+from app.deadlines import FREQUENCY_DAYS, compute_deadlines, deadline_for
+
+def _scalar(hours, minutes, frequency, start):
+    sessions_needed = hours / (minutes / 60.0)
+    return start + timedelta(days=int(sessions_needed * FREQUENCY_DAYS[frequency]))
+
+def test_engine_matches_scalar_formula():
+    rng = random.Random(0)
+    start = datetime(2030, 1, 1, 9, 30)
+    rows = [(round(rng.uniform(0.1, 200), 2), rng.choice([5, 15, 25, 30, 45, 60, 90]), rng.choice(list(FREQUENCY_DAYS))) for _ in range(5000)]
+    deadlines, valid = compute_deadlines([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], start)
+    assert valid.all()
+    assert [d.astype(datetime) for d in deadlines] == [_scalar(h, m, f, start) for h, m, f in rows]
+
+def test_engine_flags_rows_without_a_deadline():
+    deadlines, valid = compute_deadlines(
+        [10, 0, 5, float("nan"), 1e12, 3],
+        [60, 60, 0, 60, 1, 30],
+        ["weekly", "Daily", "Once", None, "Monthly", "unknown"],
+        np.array([datetime(2030, 1, 1)] * 6, dtype="datetime64[us]"),
+    )
+    assert valid.tolist() == [True, False, False, False, False, True]
+    assert deadlines[0].astype(datetime) == datetime(2030, 3, 12)  # 10 weekly sessions
+    assert deadlines[5].astype(datetime) == datetime(2030, 1, 7)   # unknown frequency counts as Once
+
+def test_deadline_for_single_chunk():
+    assert deadline_for(2, 30, "Daily", datetime(2030, 1, 1)) == datetime(2030, 1, 5)
+    assert deadline_for(0, 30, "Daily", datetime(2030, 1, 1)) is None
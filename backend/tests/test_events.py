@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.events import RESYNC, EventBroker, broker, format_sse
+
+client = TestClient(app)
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+def test_broker_fan_out_and_replay():
+    b = EventBroker()
+    live = b.subscribe()
+    first = b.publish("plan.updated", "p1", version=2)
+    b.publish("chunk.deleted", "p1", version=3, chunk_id="c1")
+    assert [e["type"] for e in _drain(live)] == ["plan.updated", "chunk.deleted"]
+
+    # Reconnect with Last-Event-ID replays only what was missed
+    resumed = b.subscribe(last_event_id=first["id"])
+    assert [e["type"] for e in _drain(resumed)] == ["chunk.deleted"]
+
+    # Ids the broker doesn't know (e.g. from before a restart) force a refetch
+    assert [e["type"] for e in _drain(b.subscribe(last_event_id=999))] == [RESYNC]
+
+def test_broker_drops_slow_subscribers():
+    b = EventBroker(queue_size=2)
+    slow = b.subscribe()
+    for i in range(3):
+        b.publish("plan.updated", "p1", version=i)
+    assert not b.is_subscribed(slow)
+    assert _drain(slow)[-1]["type"] == RESYNC
+
+def test_format_sse():
+    text = format_sse({"id": 7, "type": "plan.deleted", "plan_id": "p1"})
+    assert text.startswith("id: 7\nevent: plan.deleted\ndata: {")
+    assert text.endswith("\n\n")
+
+def test_write_routes_publish_deltas():
+    queue = broker.subscribe()
+    try:
+        plan_id = client.post("/plans", json={"title": "Events"}).json()["id"]
+        client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once"}])
+        chunk_id = client.get(f"/plans/{plan_id}").json()["chunks"][0]["id"]
+        client.patch(f"/plans/{plan_id}/chunks/{chunk_id}", json={"status": "DONE"})
+        client.delete(f"/plans/{plan_id}")
+
+        events = [e for e in _drain(queue) if e["plan_id"] == plan_id]
+        assert [e["type"] for e in events] == [
+            "plan.created",
+            "chunk.created", "plan.updated",
+            "chunk.updated", "plan.updated",
+            "plan.deleted",
+        ]
+        assert events[3]["chunk"]["status"] == "DONE"
+        assert events[4]["plan"]["done_count"] == 1
+        assert "chunks" not in events[4]["plan"]
+    finally:
+        broker.unsubscribe(queue)
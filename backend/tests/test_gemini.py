@@ -24,3 +24,110 @@ def test_suggest_chunks_mock():
     get_res = client.get(f"/plans/{plan_id}")
     plan = get_res.json()
     assert len(plan["chunks"]) == 0
+
+def test_batch_chunk_details_one_call_with_per_title_fallback(tmp_path):
+    import json
+    from unittest.mock import patch
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.ai_cache import PromptCache
+    from app.migrations import run_migrations
+
+    path = tmp_path / "batch.db"
+    run_migrations(create_engine(f"sqlite:///{path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    cache = PromptCache(engine, engine, ttl=60, max_entries=100)
+    prompts = []
+
+    async def fake_generate(prompt, api_key=None, **kwargs):
+        prompts.append(prompt)
+        if "numbered tasks" in prompt:
+            # The model skips task 3
+            return json.dumps([
+                {"task": 1, "description": "Warm up", "duration_minutes": 15, "frequency": "Daily"},
+                {"task": 2, "description": "Long run", "duration_minutes": 90, "frequency": "Weekly"},
+            ])
+        return json.dumps({"description": "Single", "duration_minutes": 30, "frequency": "Once"})
+
+    titles = ["Stretch", "Run", "Rest", "Stretch"]
+    with patch("app.gemini.prompt_cache", cache), patch("app.gemini._generate_with_retry", fake_generate):
+        res = client.post("/chunks/suggest_details/batch", json={"titles": titles}, headers={"x-gemini-api-key": "k"})
+        assert res.status_code == 200
+        data = res.json()
+        assert list(data) == ["Stretch", "Run", "Rest"]
+        assert data["Run"]["duration_minutes"] == 90
+        assert data["Rest"]["description"] == "Single"
+        assert len(prompts) == 2  # one batch prompt + one fallback for the missing title
+
+        # Batch answers are cached per title for the single endpoint too
+        single = client.post("/chunks/suggest_details", json={"title": "Stretch"}, headers={"x-gemini-api-key": "k"})
+        assert single.json()["description"] == "Warm up"
+        assert len(prompts) == 2
+
+def test_batch_fallbacks_past_the_rate_limit_keep_batch_answers():
+    import asyncio
+    import json
+    from unittest.mock import patch
+    from app import gemini
+
+    limiter = gemini.RateLimiter(rate=0.001, burst=3, max_wait=0.1)
+    running = []
+    peak = []
+
+    async def fake_generate(prompt, api_key=None, **kwargs):
+        await limiter.acquire(api_key)
+        running.append(prompt)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(prompt)
+        if "numbered tasks" in prompt:
+            # Only task 1 is answered, leaving more titles than the bucket has tokens
+            return json.dumps([{"task": 1, "description": "Batched", "duration_minutes": 15, "frequency": "Daily"}])
+        return json.dumps({"description": "Single", "duration_minutes": 30, "frequency": "Once"})
+
+    titles = [f"Step {i}" for i in range(8)]
+    with patch("app.gemini._generate_with_retry", fake_generate):
+        res = client.post("/chunks/suggest_details/batch", json={"titles": titles}, headers={"x-gemini-api-key": "k", "Cache-Control": "no-cache"})
+    assert res.status_code == 200
+    data = res.json()
+    assert list(data) == titles
+    assert data["Step 0"]["description"] == "Batched"
+    descriptions = [data[title]["description"] for title in titles[1:]]
+    assert descriptions.count("Single") == 2
+    assert descriptions.count(gemini.FALLBACK_DETAILS["description"]) == 5
+    assert max(peak) <= gemini.DETAILS_FALLBACK_CONCURRENCY
+
+def test_suggest_tiers():
+    from unittest.mock import patch
+    plan_id = client.post("/plans", json={"title": "Run a 10k", "description": "Run 3 times a week\nStretch daily 15 min"}).json()["id"]
+
+    local = client.post(f"/plans/{plan_id}/suggest", params={"tier": "local"})
+    assert local.headers["x-suggestion-tier"] == "local"
+    assert [t["frequency"] for t in local.json()] == ["Once", "Daily"]
+    assert local.json()[1]["duration_minutes"] == 15
+
+    # auto falls back to the local planner when Gemini is unavailable; ai reports the error
+    with patch("app.gemini.DEFAULT_API_KEY", ""):
+        auto = client.post(f"/plans/{plan_id}/suggest", headers={"Cache-Control": "no-cache"})
+        assert auto.status_code == 200
+        assert auto.headers["x-suggestion-tier"] == "local"
+        assert auto.json() == local.json()
+        ai_only = client.post(f"/plans/{plan_id}/suggest", params={"tier": "ai"}, headers={"Cache-Control": "no-cache"})
+        assert ai_only.status_code == 400
+        stream = client.post(f"/plans/{plan_id}/suggest/stream", headers={"Cache-Control": "no-cache"})
+        assert stream.headers["x-suggestion-tier"] == "local"
+        assert len(stream.text.splitlines()) == 2
+
+def test_slow_ai_falls_back_to_local():
+    import asyncio
+    from unittest.mock import patch
+    plan_id = client.post("/plans", json={"title": "Slow AI", "description": "Read docs"}).json()["id"]
+
+    async def slow_suggestions(*args, **kwargs):
+        await asyncio.sleep(1)
+        return [{"title": "Late"}]
+
+    with patch("app.main.generate_plan_suggestions", slow_suggestions), patch("app.main.AI_SUGGEST_TIMEOUT", 0.05):
+        res = client.post(f"/plans/{plan_id}/suggest")
+    assert res.headers["x-suggestion-tier"] == "local"
+    assert res.json()[0]["title"] == "Read docs"
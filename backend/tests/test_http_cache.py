@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.http_cache import if_none_match, no_cache
+
+client = TestClient(app)
+
+def test_if_none_match_parsing():
+    assert if_none_match('"a", "b"', '"b"')
+    assert if_none_match('W/"b"', '"b"')
+    assert if_none_match("*", '"b"')
+    assert not if_none_match('"a"', '"b"')
+    assert not if_none_match(None, '"b"')
+
+def test_plan_etag_conditional_get():
+    plan_id = client.post("/plans", json={"title": "ETag"}).json()["id"]
+    first = client.get(f"/plans/{plan_id}")
+    etag = first.headers["etag"]
+
+    cached = client.get(f"/plans/{plan_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    # Any chunk write bumps the version
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once"}])
+    fresh = client.get(f"/plans/{plan_id}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert fresh.json()["version"] == first.json()["version"] + 1
+
+    chunk_id = fresh.json()["chunks"][0]["id"]
+    etag = fresh.headers["etag"]
+    client.patch(f"/plans/{plan_id}/chunks/{chunk_id}", json={"title": "Renamed"})
+    assert client.get(f"/plans/{plan_id}", headers={"If-None-Match": etag}).status_code == 200
+
+def test_plan_list_etag():
+    client.post("/plans", json={"title": "List ETag"})
+    first = client.get("/plans", params={"include": "summary", "limit": 200})
+    etag = first.headers["etag"]
+    assert client.get("/plans", params={"include": "summary", "limit": 200}, headers={"If-None-Match": etag}).status_code == 304
+    # Different projection, different representation
+    assert client.get("/plans", params={"include": "none", "limit": 200}, headers={"If-None-Match": etag}).status_code == 200
+
+    plan_id = first.json()[0]["id"]
+    client.patch(f"/plans/{plan_id}", json={"title": "Renamed"})
+    assert client.get("/plans", params={"include": "summary", "limit": 200}, headers={"If-None-Match": etag}).status_code == 200
+
+def test_no_cache_directives():
+    assert no_cache("no-cache")
+    assert no_cache("max-age=0, private")
+    assert not no_cache("max-age=60")
+    assert not no_cache(None)
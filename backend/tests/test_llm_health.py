@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import patch, MagicMock
+from app.llm_health import CLOSED, OPEN, HALF_OPEN, ModelHealth
+from app import gemini
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_and_recovers_through_one_probe():
+    clock = FakeClock()
+    health = ModelHealth(failure_threshold=2, cooldown=30, clock=clock)
+    breaker = health.breaker("key", "m1")
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert health.order("key", ["m1", "m2"]) == ["m2"]
+
+    clock.now = 31
+    assert "m1" in health.order("key", ["m1", "m2"])
+    assert breaker.acquire() and breaker.state == HALF_OPEN
+    assert not breaker.acquire()  # only one probe in flight
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    health = ModelHealth(failure_threshold=1, cooldown=10, clock=clock)
+    breaker = health.breaker("key", "m1")
+    breaker.record_failure(0.1)
+    clock.now = 11
+    assert breaker.acquire()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN and breaker.opens == 2
+
+def test_order_prefers_faster_healthier_models():
+    health = ModelHealth()
+    for _ in range(5):
+        health.breaker("key", "slow").record_success(4.0)
+        health.breaker("key", "fast").record_success(0.5)
+    assert health.order("key", ["slow", "fast", "untried"]) == ["fast", "slow", "untried"]
+    # Health is tracked per key: another key still starts from preference order
+    assert health.order("other", ["slow", "fast"]) == ["slow", "fast"]
+
+def test_failing_model_stops_being_tried_first():
+    calls = []
+
+    class FakeModel:
+        def __init__(self, name):
+            self.name = name
+            self._async_client = None
+
+        async def generate_content_async(self, prompt):
+            calls.append(self.name)
+            if self.name == "down":
+                raise RuntimeError("503")
+            return MagicMock(text="{}")
+
+    async def run():
+        for _ in range(5):
+            await gemini._generate_with_retry("prompt", api_key="key")
+
+    with patch("app.gemini.genai.GenerativeModel", FakeModel), \
+         patch("app.gemini.MODELS", ["down", "up"]), \
+         patch("app.gemini.model_health", ModelHealth(failure_threshold=3)), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        asyncio.run(run())
+
+    # One failure is enough to rank the healthy model first
+    assert calls == ["down", "up", "up", "up", "up", "up"]
+
+def _hedge_models(delays, texts=None):
+    cancelled = []
+
+    class FakeModel:
+        def __init__(self, name):
+            self.name = name
+            self._async_client = None
+
+        async def generate_content_async(self, prompt):
+            try:
+                await asyncio.sleep(delays[self.name])
+            except asyncio.CancelledError:
+                cancelled.append(self.name)
+                raise
+            return MagicMock(text=(texts or {}).get(self.name, '{"model": "%s"}' % self.name))
+
+    return FakeModel, cancelled
+
+def _hedged(FakeModel, prompt_validate=True):
+    from app.llm_health import HedgeStats
+    stats = HedgeStats()
+
+    async def run():
+        return await gemini._generate_with_retry(
+            "prompt", api_key="key", hedge=True,
+            validate=gemini.json.loads if prompt_validate else None,
+        )
+
+    with patch("app.gemini.genai.GenerativeModel", FakeModel), \
+         patch("app.gemini.MODELS", ["primary", "backup"]), \
+         patch("app.gemini.HEDGE_DEFAULT_DELAY", 0.05), \
+         patch("app.gemini.model_health", ModelHealth()), \
+         patch("app.gemini.hedge_stats", stats), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        return asyncio.run(run()), stats
+
+def test_hedge_fires_and_backup_wins_when_primary_is_slow():
+    FakeModel, cancelled = _hedge_models({"primary": 2.0, "backup": 0.01})
+    text, stats = _hedged(FakeModel)
+    assert "backup" in text
+    assert cancelled == ["primary"]
+    assert stats.stats()["hedges"] == 1 and stats.stats()["backup_wins"] == 1
+
+def test_no_hedge_when_primary_is_fast():
+    FakeModel, cancelled = _hedge_models({"primary": 0.0, "backup": 0.0})
+    text, stats = _hedged(FakeModel)
+    assert "primary" in text
+    assert stats.hedges == 0 and cancelled == []
+
+def test_unparsable_primary_answer_loses_to_backup():
+    FakeModel, _ = _hedge_models({"primary": 0.0, "backup": 0.01}, texts={"primary": "Sorry, I can't"})
+    text, stats = _hedged(FakeModel)
+    assert "backup" in text
+    assert stats.hedges == 0  # not a hedge: backup ran as the fallback
+
+def test_hedge_delay_tracks_latency_percentile():
+    health = ModelHealth()
+    assert health.hedge_delay("key", "m", 0.9, default=2.0, floor=0.1) == 2.0
+    breaker = health.breaker("key", "m")
+    for latency in [0.2, 0.3, 0.4, 0.5, 1.0]:
+        breaker.record_success(latency)
+    assert health.hedge_delay("key", "m", 0.9, default=2.0, floor=0.1) == 1.0
+
+def test_token_bucket_queues_then_rejects():
+    clock = FakeClock()
+    bucket = gemini.TokenBucket(rate=2, burst=2, max_wait=1.0, clock=clock)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == 0.5  # queued behind the burst
+    assert bucket.reserve() == 1.0
+    try:
+        bucket.reserve()
+        assert False, "expected RateLimited"
+    except gemini.RateLimited as e:
+        assert e.retry_after > 1.0
+    clock.now = 10
+    assert bucket.reserve() == 0
+
+def test_identical_prompts_in_flight_share_one_call():
+    flight = gemini.SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("prompt", upstream) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert len(calls) == 1 and flight.coalesced == 4
+
+def test_saturated_key_gets_429():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    limiter = gemini.RateLimiter(rate=0.01, burst=1, max_wait=0.1)
+    with patch("app.gemini.rate_limiter", limiter):
+        limiter.bucket("busy-key").reserve()  # use up the burst
+        res = TestClient(app).post(
+            "/chunks/suggest_details",
+            json={"title": "Rate limited"},
+            headers={"x-gemini-api-key": "busy-key", "Cache-Control": "no-cache"},
+        )
+    assert res.status_code == 429
+    assert int(res.headers["retry-after"]) > 0
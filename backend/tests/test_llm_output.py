@@ -0,0 +1,34 @@
+import pytest
+from app.llm_output import (
+    ChunkDetails, SuggestedTask, UnparsableOutput, extract_json, parse_items, parse_object,
+)
+
+def test_extract_json_from_noisy_text():
+    assert extract_json('```json\n[{"a": 1}]\n```', list) == [{"a": 1}]
+    assert extract_json('Sure! Here are your tasks: [{"a": 1}] Hope that helps [really].', list) == [{"a": 1}]
+    assert extract_json('Details: {"description": "x"} -- enjoy {', dict) == {"description": "x"}
+    # A truncated array still gives back the complete objects
+    assert extract_json('[{"a": 1}, {"a": 2}, {"a"', list) == [{"a": 1}, {"a": 2}]
+    with pytest.raises(UnparsableOutput):
+        extract_json("I can't help with that.", list)
+
+def test_parse_items_validates_and_drops_bad_items():
+    text = '''[
+        {"title": "Read", "estimated_total_hours": "4", "duration_minutes": 30.0, "frequency": "daily"},
+        {"description": "no title"},
+        {"title": "Build", "frequency": "Weekly", "deadline": null}
+    ]'''
+    tasks = parse_items(text, SuggestedTask)
+    assert [t["title"] for t in tasks] == ["Read", "Build"]
+    assert tasks[0] == {
+        "title": "Read", "description": "", "estimated_total_hours": 4.0,
+        "duration_minutes": 30, "frequency": "Daily",
+    }
+    assert "deadline" not in tasks[1]
+    with pytest.raises(UnparsableOutput):
+        parse_items('[{"description": "no title"}]', SuggestedTask)
+
+def test_parse_object_rejects_wrong_shape():
+    assert parse_object('{"description": "d", "duration_minutes": 20, "frequency": "Once"}', ChunkDetails)["frequency"] == "Once"
+    with pytest.raises(UnparsableOutput):
+        parse_object('{"description": "d", "duration_minutes": 20, "frequency": "Hourly"}', ChunkDetails)
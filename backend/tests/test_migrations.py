@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.migrations import MIGRATIONS, applied_migrations, run_migrations
+
+def _engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+def test_run_migrations_once(tmp_path):
+    engine = _engine(tmp_path)
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    assert applied_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    # Second startup only reads schema_migrations
+    assert run_migrations(engine) == []
+
+def test_chunk_queries_use_indexes(tmp_path):
+    engine = _engine(tmp_path)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT max(deadline) FROM chunk WHERE plan_id = 'p'")
+        ))
+        assert "ix_chunk_plan_id_deadline" in plan
+        plan = " ".join(row[-1] for row in conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT count(*) FROM chunk WHERE plan_id = 'p' AND status = 'DONE'")
+        ))
+        assert "ix_chunk_plan_id_status" in plan
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM chunk WHERE scheduled_date < '2030-02-01' "
+            "AND (deadline IS NULL OR deadline >= '2030-01-01')"
+        )))
+        assert "ix_chunk_schedule_window" in plan
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM chunk "
+            "WHERE json_extract(chunk.history, '$.deferred') IS NOT NULL AND scheduled_date IS NOT NULL"
+        )))
+        assert "ix_chunk_deferred" in plan
+
+def test_baseline_upgrades_legacy_chunk_table(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        # Pre-history schema
+        conn.execute(text("""
+            CREATE TABLE chunk (
+                title VARCHAR NOT NULL, description VARCHAR, status VARCHAR(11) NOT NULL,
+                estimated_hours FLOAT NOT NULL, duration_minutes INTEGER NOT NULL,
+                frequency VARCHAR NOT NULL, scheduled_date DATETIME, deadline DATETIME,
+                id VARCHAR NOT NULL PRIMARY KEY, plan_id VARCHAR
+            )
+        """))
+    run_migrations(engine)
+    with engine.connect() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(chunk)"))]
+    assert "history" in columns
+
+def test_failed_migration_leaves_no_partial_schema(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+
+    def broken(conn):
+        conn.exec_driver_sql('ALTER TABLE "plan" ADD COLUMN half_done INTEGER')
+        conn.exec_driver_sql("SELECT * FROM missing_table")
+
+    monkeypatch.setattr("app.migrations.MIGRATIONS", MIGRATIONS + [(99, "broken", broken)])
+    with pytest.raises(Exception):
+        run_migrations(engine)
+    assert 99 not in applied_migrations(engine)
+    with engine.connect() as conn:
+        columns = [row[1] for row in conn.execute(text('PRAGMA table_info("plan")'))]
+    assert "half_done" not in columns
+
+def test_history_blobs_become_chunk_events(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    monkeypatch.setattr("app.migrations.MIGRATIONS", [m for m in MIGRATIONS if m[1] != "chunk events"])
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO chunk (id, title, status, estimated_hours, duration_minutes, frequency, history)
+            VALUES ('a', 'A', 'TODO', 1, 30, 'Daily', :history), ('b', 'B', 'TODO', 1, 30, 'Daily', NULL)
+        """), {"history": '{"skipped": ["2030-01-01", "2030-01-03"], "deferred": {"2030-01-02": "2030-01-09"}}'})
+    monkeypatch.setattr("app.migrations.MIGRATIONS", MIGRATIONS)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        events = conn.execute(text("SELECT chunk_id, kind, day, target FROM chunk_event ORDER BY id")).all()
+    assert [tuple(e) for e in events] == [
+        ("a", "skip", "2030-01-01", None),
+        ("a", "skip", "2030-01-03", None),
+        ("a", "defer", "2030-01-02", "2030-01-09"),
+    ]
@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import Chunk, ChunkStatus, Frequency
+from app.occurrences import expand
+
+client = TestClient(app)
+
+def _dates(chunk, start, end):
+    return [o["date"] for o in expand(chunk, start, end)]
+
+def test_recurrence_rules():
+    daily = Chunk(title="D", frequency=Frequency.DAILY, scheduled_date=datetime(2030, 1, 30, 9), deadline=datetime(2030, 2, 2, 18))
+    assert _dates(daily, date(2030, 1, 1), date(2030, 3, 1)) == ["2030-01-30", "2030-01-31", "2030-02-01", "2030-02-02"]
+
+    weekly = Chunk(title="W", frequency=Frequency.WEEKLY, scheduled_date=datetime(2030, 1, 1))
+    assert _dates(weekly, date(2030, 1, 10), date(2030, 1, 31)) == ["2030-01-15", "2030-01-22", "2030-01-29"]
+
+    # Months without a 31st are skipped, as getDate() never matches there
+    monthly = Chunk(title="M", frequency=Frequency.MONTHLY, scheduled_date=datetime(2030, 1, 31))
+    assert _dates(monthly, date(2030, 1, 1), date(2030, 5, 31)) == ["2030-01-31", "2030-03-31", "2030-05-31"]
+
+    once = Chunk(title="O", frequency=Frequency.ONCE, scheduled_date=datetime(2030, 1, 5))
+    assert _dates(once, date(2030, 1, 1), date(2030, 1, 31)) == ["2030-01-05"]
+    assert _dates(once, date(2030, 1, 6), date(2030, 1, 31)) == []
+    assert _dates(Chunk(title="Unscheduled"), date(2030, 1, 1), date(2030, 1, 31)) == []
+
+def test_history_moves_and_marks_days():
+    chunk = Chunk(
+        title="H", frequency=Frequency.DAILY, status=ChunkStatus.DONE,
+        scheduled_date=datetime(2030, 1, 1), deadline=datetime(2030, 1, 3),
+        history={"deferred": {"2030-01-02": "2030-01-10"}, "skipped": ["2030-01-03"]},
+    )
+    occurrences = expand(chunk, date(2030, 1, 1), date(2030, 1, 31))
+    # Moved past the deadline still shows up on its new day
+    assert [(o["date"], o["status"]) for o in occurrences] == [
+        ("2030-01-01", "DONE"),
+        ("2030-01-03", "SKIPPED"),
+        ("2030-01-10", "TODO"),
+    ]
+
+def test_occurrences_endpoint_and_cache():
+    plan_id = client.post("/plans", json={"title": "Calendar"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "Run", "frequency": "Weekly"}])
+    chunk = client.post(f"/plans/{plan_id}/reschedule", json={"start": "2030-01-01T00:00:00"}).json()["chunks"][0]
+
+    params = {"start": "2030-01-01", "end": "2030-01-31", "plan_id": plan_id}
+    body = client.get("/occurrences", params=params).json()
+    assert [o["date"] for o in body["occurrences"]] == ["2030-01-01", "2030-01-08", "2030-01-15", "2030-01-22", "2030-01-29"]
+    assert body["chunks"][chunk["id"]]["title"] == "Run"
+
+    hits = client.get("/stats/cache").json()["occurrences"]["hits"]
+    assert client.get("/occurrences", params=params).json() == body
+    assert client.get("/stats/cache").json()["occurrences"]["hits"] == hits + 1
+
+    # A chunk write drops the cached range
+    client.patch(f"/plans/{plan_id}/chunks/{chunk['id']}", json={"deadline": "2030-01-10T00:00:00"})
+    body = client.get("/occurrences", params=params).json()
+    assert [o["date"] for o in body["occurrences"]] == ["2030-01-01", "2030-01-08"]
+
+    assert client.get("/occurrences", params={"start": "2030-02-01", "end": "2030-01-01"}).status_code == 400
+    assert client.get("/occurrences", params={"start": "2030-01-01", "end": "2031-06-01"}).status_code == 400
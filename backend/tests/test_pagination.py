@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def _walk_pages(**params):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        res = client.get("/plans", params=query)
+        assert res.status_code == 200
+        pages.append(res.json())
+        cursor = res.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+def test_plans_cursor_pagination():
+    created = [client.post("/plans", json={"title": f"Page {i}"}).json()["id"] for i in range(5)]
+
+    pages = _walk_pages(limit=2, include="none")
+    assert all(len(page) <= 2 for page in pages)
+    seen = [p["id"] for page in pages for p in page]
+    # Every plan exactly once, in creation order
+    assert len(seen) == len(set(seen))
+    assert [pid for pid in seen if pid in created] == created
+
+def test_plans_projection():
+    plan_id = client.post("/plans", json={"title": "Projection", "description": "Step 1: A. Step 2: B."}).json()["id"]
+    client.post(f"/plans/{plan_id}/breakdown")
+    chunk_id = client.get(f"/plans/{plan_id}").json()["chunks"][0]["id"]
+    client.patch(f"/plans/{plan_id}/chunks/{chunk_id}", json={"status": "DONE"})
+
+    def find(include):
+        for page in _walk_pages(limit=200, include=include):
+            for p in page:
+                if p["id"] == plan_id:
+                    return p
+
+    assert len(find("chunks")["chunks"]) >= 2
+    assert "chunks" not in find("none")
+    summary = find("summary")
+    assert "chunks" not in summary
+    assert summary["chunk_count"] >= 2
+    assert summary["done_count"] == 1
+
+def test_plans_invalid_cursor():
+    res = client.get("/plans", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
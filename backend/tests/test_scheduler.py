@@ -0,0 +1,109 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.database import engine
+from app.models import Chunk, Frequency
+from app.scheduler import Task, booked_minutes, chunk_task, schedule, start_of_day
+
+client = TestClient(app)
+
+def test_sessions_fill_daily_capacity():
+    # Four 60-minute sessions with 120 minutes a day: two days
+    placements = schedule([Task(60, 1)] * 4, capacity=120)
+    assert [p.first for p in placements] == [0, 0, 1, 1]
+    # A session longer than the budget takes a day of its own
+    placements = schedule([Task(30, 1), Task(300, 1), Task(30, 1)], capacity=120)
+    assert [p.first for p in placements] == [0, 1, 0]
+
+def test_recurring_sessions_are_spaced_by_frequency():
+    weekly = Task(60, 3, spacing=7)
+    (placement,) = schedule([weekly], capacity=60)
+    assert (placement.first, placement.last) == (0, 14)
+
+def test_least_slack_goes_first():
+    relaxed = Task(60, 1, deadline=30)
+    tight = Task(60, 2, deadline=1)
+    unbounded = Task(60, 1)
+    placements = schedule([unbounded, relaxed, tight], capacity=60)
+    assert [p.first for p in placements] == [3, 2, 0]
+    assert not any(p.late for p in placements)
+
+    # Can't fit: reported late rather than dropped
+    placements = schedule([Task(60, 3, deadline=1)], capacity=60)
+    assert placements[0].late and placements[0].last == 2
+
+def test_booked_load_from_other_plans():
+    day0 = datetime(2030, 1, 1)
+    other = Chunk(title="Other", estimated_hours=2, duration_minutes=60, frequency=Frequency.DAILY, scheduled_date=day0)
+    booked = booked_minutes([other], day0, horizon=5)
+    assert booked.tolist() == [60, 60, 0, 0, 0]
+
+    new = Chunk(title="New", estimated_hours=1, duration_minutes=60, frequency=Frequency.ONCE)
+    (placement,) = schedule([chunk_task(new, day0)], capacity=60, horizon=5, booked=booked)
+    assert placement.first == 2
+
+def test_schedules_large_workspace_quickly():
+    rng = np.random.default_rng(0)
+    tasks = [
+        Task(int(m), int(s), int(sp), int(d))
+        for m, s, sp, d in zip(
+            rng.choice([15, 30, 60], 20_000), rng.integers(1, 6, 20_000),
+            rng.choice([1, 7], 20_000), rng.integers(0, 365, 20_000),
+        )
+    ]
+    started = time.perf_counter()
+    placements = schedule(tasks, capacity=8 * 60)
+    assert time.perf_counter() - started < 1.0
+    assert len(placements) == len(tasks)
+
+def test_reschedule_plan_endpoint():
+    plan_id = client.post("/plans", json={"title": "Reschedule"}).json()["id"]
+    deadline = (datetime.now() + timedelta(days=3)).date().isoformat()
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "Later", "estimated_hours": 1, "duration_minutes": 60, "frequency": "Once"},
+        {"title": "Urgent", "estimated_hours": 1, "duration_minutes": 60, "frequency": "Once", "deadline": deadline},
+    ])
+
+    start = "2031-03-01T09:30:00"
+    response = client.post(f"/plans/{plan_id}/reschedule", json={"start": start, "capacity_minutes": 60})
+    assert response.status_code == 200
+    chunks = {c["title"]: c for c in response.json()["chunks"]}
+    # The deadline has passed by the start day: still first, and reported late
+    assert chunks["Urgent"]["scheduled_date"].startswith("2031-03-01T00:00:00")
+    assert chunks["Later"]["scheduled_date"].startswith("2031-03-02")
+    assert response.headers["X-Late-Chunks"] == "1"
+
+    assert client.post("/plans/missing/reschedule").status_code == 404
+
+def test_reschedule_keeps_started_recurring_chunks():
+    plan_id = client.post("/plans", json={"title": "Started"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "Habit", "estimated_hours": 3, "duration_minutes": 60, "frequency": "Daily"},
+        {"title": "Overdue", "estimated_hours": 1, "duration_minutes": 60, "frequency": "Once"},
+    ])
+    today = start_of_day()
+    started = today - timedelta(days=2)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE chunk SET scheduled_date = :day WHERE plan_id = :plan_id"), {"day": started, "plan_id": plan_id})
+
+    response = client.post(f"/plans/{plan_id}/reschedule", json={"capacity_minutes": 60})
+    assert response.status_code == 200
+    chunks = {c["title"]: c for c in response.json()["chunks"]}
+    # The habit's occurrences stay anchored; its session today is booked...
+    assert chunks["Habit"]["scheduled_date"].startswith(started.date().isoformat())
+    # ...so the overdue one-off moves past it
+    assert chunks["Overdue"]["scheduled_date"] >= (today + timedelta(days=1)).date().isoformat()
+
+def test_reschedule_workspace_endpoint():
+    plan_id = client.post("/plans", json={"title": "Workspace"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "estimated_hours": 1, "frequency": "Once"}])
+    response = client.post("/schedule", json={"start": "2032-01-01T00:00:00"})
+    assert response.status_code == 200
+    body = response.json()
+    assert plan_id in body["plans"]
+    assert body["scheduled"] >= body["moved"] >= 1
+    chunk = client.get(f"/plans/{plan_id}").json()["chunks"][0]
+    assert chunk["scheduled_date"] >= "2032-01-01"
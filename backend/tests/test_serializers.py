@@ -0,0 +1,35 @@
+import json
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import Plan, Chunk, ChunkStatus, PlanRead, PlanSummary, PlanMeta
+from app.serializers import serialize_plan, serialize_plans
+
+client = TestClient(app)
+
+def _plan():
+    plan = Plan(title="Ünïcode plan", created_at=datetime(2030, 1, 2, 3, 4, 5, 678900), deadline=datetime(2030, 2, 1), done_count=1)
+    plan.chunks.append(Chunk(title="A", status=ChunkStatus.DONE, estimated_hours=2, deadline=datetime(2030, 2, 1, tzinfo=timezone.utc),
+                             history={"skipped": ["2030-01-05"], "deferred": {"2030-01-06": "2030-01-07"}}))
+    plan.chunks.append(Chunk(title="B", frequency="Weekly", scheduled_date=datetime(2030, 1, 3)))
+    return plan
+
+def test_fast_serializer_matches_pydantic():
+    plan = _plan()
+    for include, model in [("chunks", PlanRead), ("summary", PlanSummary), ("none", PlanMeta)]:
+        expected = model.model_validate(plan).model_dump(mode="json")
+        assert json.loads(serialize_plan(plan, include, fast=True)) == expected
+        assert json.loads(serialize_plan(plan, include, fast=False)) == expected
+    assert json.loads(serialize_plans([plan, plan], fast=True)) == [PlanRead.model_validate(plan).model_dump(mode="json")] * 2
+
+def test_fast_json_routes(monkeypatch):
+    plan_id = client.post("/plans", json={"title": "Fast"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once", "deadline": "2030-01-01"}])
+    slow = client.get(f"/plans/{plan_id}").json()
+
+    monkeypatch.setattr("app.serializers.FAST_JSON", True)
+    # Write routes respond through the fast path too; the payload is unchanged
+    fast = client.patch(f"/plans/{plan_id}", json={"color": slow["color"]}).json()
+    assert fast["version"] == slow["version"] + 1
+    fast["version"] = slow["version"]
+    assert fast == slow
@@ -0,0 +1,119 @@
+import json
+import random
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.json_stream import JsonArrayStream
+from app import gemini
+from app.llm_health import ModelHealth
+
+client = TestClient(app)
+
+TASKS = [
+    {"title": "Read {docs} \"first\"", "description": "a ] b", "estimated_total_hours": 2.0, "duration_minutes": 60, "frequency": "Daily"},
+    {"title": "Practice", "description": "c\\\\", "estimated_total_hours": 3.0, "duration_minutes": 30, "frequency": "Weekly", "deadline": "2031-01-01"},
+]
+
+def test_json_array_stream_any_split():
+    text = "Here you go:\n```json\n" + json.dumps(TASKS, indent=2) + "\n```"
+    for _ in range(200):
+        parser = JsonArrayStream()
+        items, i = [], 0
+        while i < len(text):
+            step = random.randint(1, 9)
+            items += parser.feed(text[i:i + step])
+            i += step
+        assert items == TASKS
+        assert parser.done
+
+def test_json_array_stream_emits_objects_before_the_array_closes():
+    parser = JsonArrayStream()
+    assert parser.feed('[{"title": "A"}, {"title": "B"') == [{"title": "A"}]
+    assert parser.feed('}]') == [{"title": "B"}]
+
+class StreamingModel:
+    output = json.dumps(TASKS)
+
+    def __init__(self, name):
+        self._async_client = None
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None):
+        text = self.output
+        parts = [text[i:i + 16] for i in range(0, len(text), 16)]
+
+        async def iterate():
+            for part in parts:
+                yield MagicMock(text=part)
+
+        return iterate()
+
+def test_suggest_stream_ndjson():
+    plan_id = client.post("/plans", json={"title": "Streamed plan", "description": "stream it"}).json()["id"]
+    with patch("app.gemini.genai.GenerativeModel", StreamingModel), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        res = client.post(
+            f"/plans/{plan_id}/suggest/stream",
+            headers={"x-gemini-api-key": "k", "Cache-Control": "no-cache"},
+        )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [task["title"] for task in lines] == [task["title"] for task in TASKS]
+    # Deadline post-processing runs per task
+    assert lines[0]["estimated_hours"] == 2.0 and lines[0]["deadline"]
+    assert lines[1]["deadline"] == "2031-01-01"
+
+def test_suggest_stream_errors_before_first_task():
+    plan_id = client.post("/plans", json={"title": "No key"}).json()["id"]
+    with patch("app.gemini.DEFAULT_API_KEY", ""):
+        res = client.post(f"/plans/{plan_id}/suggest/stream", params={"tier": "ai"}, headers={"Cache-Control": "no-cache"})
+    assert res.status_code == 400
+
+class UnparsableModel(StreamingModel):
+    output = "Sorry, I can't break this plan down."
+
+def test_suggest_stream_rejects_output_without_tasks():
+    plan_id = client.post("/plans", json={"title": "Nothing parses"}).json()["id"]
+    with patch("app.gemini.genai.GenerativeModel", UnparsableModel), \
+         patch("app.gemini.model_health", ModelHealth()), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        res = client.post(
+            f"/plans/{plan_id}/suggest/stream", params={"tier": "ai"},
+            headers={"x-gemini-api-key": "k", "Cache-Control": "no-cache"},
+        )
+    assert res.status_code == 400
+
+def test_suggest_stream_auto_falls_back_when_no_task_parses():
+    plan_id = client.post("/plans", json={"title": "Learn Go", "description": "basics"}).json()["id"]
+    with patch("app.gemini.genai.GenerativeModel", UnparsableModel), \
+         patch("app.gemini.model_health", ModelHealth()), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        res = client.post(
+            f"/plans/{plan_id}/suggest/stream",
+            headers={"x-gemini-api-key": "k", "Cache-Control": "no-cache"},
+        )
+    assert res.status_code == 200
+    assert res.headers["X-Suggestion-Tier"] == "local"
+    assert [json.loads(line) for line in res.text.splitlines()]
+
+class FirstModelUnparsable(StreamingModel):
+    def __init__(self, name):
+        super().__init__(name)
+        if name == gemini.MODELS[0]:
+            self.output = UnparsableModel.output
+
+def test_suggest_stream_moves_past_a_model_without_valid_tasks():
+    plan_id = client.post("/plans", json={"title": "Second model"}).json()["id"]
+    health = ModelHealth()
+    with patch("app.gemini.genai.GenerativeModel", FirstModelUnparsable), \
+         patch("app.gemini.model_health", health), \
+         patch("app.gemini.client_pool", gemini.ClientPool(factory=lambda key: object())):
+        res = client.post(
+            f"/plans/{plan_id}/suggest/stream", params={"tier": "ai"},
+            headers={"x-gemini-api-key": "k", "Cache-Control": "no-cache"},
+        )
+    assert res.status_code == 200
+    assert [json.loads(line)["title"] for line in res.text.splitlines()] == [task["title"] for task in TASKS]
+    # The unparsable answer counts against the first model, not for it
+    assert [ok for ok, _ in health.breaker("k", gemini.MODELS[0]).samples] == [False]
+    assert [ok for ok, _ in health.breaker("k", gemini.MODELS[1]).samples] == [True]
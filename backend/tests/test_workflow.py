@@ -69,3 +69,46 @@ def test_invalid_status_update():
         "status": "INVALID_STATUS"
     })
     assert response.status_code == 400
+
+def test_batch_chunk_mutations():
+    plan_id = client.post("/plans", json={"title": "Batch", "description": "Batch"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[
+        {"title": "A", "frequency": "Once", "status": "TODO"},
+        {"title": "B", "frequency": "Once", "status": "TODO"},
+        {"title": "C", "frequency": "Once", "status": "TODO"},
+    ])
+    ids = {c["title"]: c["id"] for c in client.get(f"/plans/{plan_id}").json()["chunks"]}
+
+    response = client.patch(f"/plans/{plan_id}/chunks", json={
+        "update": [
+            {"id": ids["A"], "status": "DONE"},
+            {"id": ids["B"], "deadline": "2031-03-01T00:00:00"},
+        ],
+        "delete": [ids["C"]],
+        "create": [{"title": "D", "frequency": "Weekly"}],
+    })
+    assert response.status_code == 200
+    plan = response.json()
+    assert sorted(c["title"] for c in plan["chunks"]) == ["A", "B", "D"]
+    assert (plan["chunk_count"], plan["done_count"], plan["todo_count"]) == (3, 1, 2)
+    assert plan["deadline"].startswith("2031-03-01")
+
+def test_batch_chunk_mutations_are_atomic():
+    plan_id = client.post("/plans", json={"title": "Atomic", "description": "Atomic"}).json()["id"]
+    client.post(f"/plans/{plan_id}/chunks", json=[{"title": "A", "frequency": "Once", "status": "TODO"}])
+    chunk_id = client.get(f"/plans/{plan_id}").json()["chunks"][0]["id"]
+
+    response = client.patch(f"/plans/{plan_id}/chunks", json={
+        "update": [{"id": chunk_id, "title": "Renamed"}, {"id": "missing", "status": "DONE"}],
+    })
+    assert response.status_code == 404
+
+    response = client.patch(f"/plans/{plan_id}/chunks", json={
+        "update": [{"id": chunk_id, "title": "Renamed", "status": "INVALID_STATUS"}],
+        "create": [{"title": "B"}],
+    })
+    assert response.status_code == 400
+
+    plan = client.get(f"/plans/{plan_id}").json()
+    assert [c["title"] for c in plan["chunks"]] == ["A"]
+    assert plan["chunk_count"] == 1
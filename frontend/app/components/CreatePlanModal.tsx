@@ -107,18 +107,34 @@ export default function CreatePlanModal({ onClose, onCreated, onOpenSettings, ex
                 if (withAI) {
                     // 2. Fetch Suggestions
                     const apiKey = localStorage.getItem('gemini_api_key') || '';
-                    const aiRes = await fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans/${planId}/suggest`, {
+                    setSuggestions([]);
+                    const aiRes = await fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans/${planId}/suggest/stream`, {
                         method: 'POST',
                         headers: {
                             'x-gemini-api-key': apiKey
                         }
                     });
-                    if (aiRes.ok) {
-                        const suggestions = await aiRes.json();
-                        if (suggestions && suggestions.length > 0) {
-                            setSuggestions(suggestions);
-                            setShowReview(true);
-                        } else {
+                    if (aiRes.ok && aiRes.body) {
+                        // NDJSON: one task per line. Open the review as soon as the first one arrives.
+                        const reader = aiRes.body.getReader();
+                        const decoder = new TextDecoder();
+                        let buffered = '';
+                        let received = 0;
+                        while (true) {
+                            const { done, value } = await reader.read();
+                            if (done) break;
+                            buffered += decoder.decode(value, { stream: true });
+                            const lines = buffered.split('\n');
+                            buffered = lines.pop() || '';
+                            const tasks = lines.filter(line => line.trim()).map(line => JSON.parse(line)).filter(task => !task.error);
+                            if (tasks.length > 0) {
+                                received += tasks.length;
+                                setSuggestions(prev => [...prev, ...tasks]);
+                                setShowReview(true);
+                                setLoading(false);
+                            }
+                        }
+                        if (received === 0) {
                             alert("AI could not generate specific tasks. Plan created successfully.");
                             onCreated(planId);
                         }
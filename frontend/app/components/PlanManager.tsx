@@ -212,15 +212,11 @@ export default function PlanManager({ planId, initialFocusTaskId, initialViewMod
 
         setPlan({ ...plan, chunks: updatedChunks, deadline: newPlanDeadline.toISOString() });
 
-        // API
-        await fetch(`${API_URL}/plans/${planId}/chunks/${chunk.id}`, {
-            method: 'PATCH',
+        // API: the server appends the event and extends the deadline the same way
+        await fetch(`${API_URL}/plans/${planId}/chunks/${chunk.id}/events`, {
+            method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                history: newHistory,
-                deadline: newDeadline.toISOString(),
-                status: 'SKIPPED'
-            })
+            body: JSON.stringify({ kind: 'skip', day: skipDate })
         });
     };
 
@@ -241,10 +237,10 @@ export default function PlanManager({ planId, initialFocusTaskId, initialViewMod
         setActiveDeferChunk(null);
 
         // API
-        await fetch(`${API_URL}/plans/${planId}/chunks/${activeDeferChunk.id}`, {
-            method: 'PATCH',
+        await fetch(`${API_URL}/plans/${planId}/chunks/${activeDeferChunk.id}/events`, {
+            method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ history: newHistory })
+            body: JSON.stringify({ kind: 'defer', day: currentTargetDate, target: newDate })
         });
     };
 
@@ -300,10 +296,10 @@ export default function PlanManager({ planId, initialFocusTaskId, initialViewMod
 
             setPlan({ ...plan, chunks: updatedChunks, deadline: newPlanDeadline.toISOString() });
 
-            await fetch(`${API_URL}/plans/${planId}/chunks/${chunkId}`, {
-                method: 'PATCH',
+            await fetch(`${API_URL}/plans/${planId}/chunks/${chunkId}/events`, {
+                method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ status: status, history: newHistory, deadline: newDeadline.toISOString() })
+                body: JSON.stringify({ kind: 'unskip', day: targetStr, status: status })
             });
             return;
         }
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Chunk } from '../types';
 
 interface ReviewSuggestionsModalProps {
@@ -34,6 +34,15 @@ export default function ReviewSuggestionsModal({ suggestions, planDeadline, onCo
     // Local state to manage edits before confirming
     const [tasks, setTasks] = useState(suggestions.map((s, i) => ({ ...s, _id: i }))); // Add temp ID
 
+    // Suggestions stream in: append the ones that arrived after opening, keeping local edits
+    const seenCount = useRef(suggestions.length);
+    useEffect(() => {
+        if (suggestions.length <= seenCount.current) return;
+        const added = suggestions.slice(seenCount.current).map((s, i) => ({ ...s, _id: seenCount.current + i }));
+        seenCount.current = suggestions.length;
+        setTasks(prev => [...prev, ...added]);
+    }, [suggestions]);
+
     const [deadlineMode, setDeadlineMode] = useState<'computed' | 'custom' | 'perpetual'>('computed');
     const [customDate, setCustomDate] = useState(planDeadline || '');
 
@@ -10,6 +10,21 @@ import ManagePlansModal from './components/ManagePlansModal';
 import ViewPlanModal from './components/ViewPlanModal';
 import SettingsModal from './components/SettingsModal';
 
+// GET /plans is cursor-paginated; follow X-Next-Cursor until the last page
+async function fetchAllPlans(): Promise<Plan[]> {
+  const plans: Plan[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: '200' });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans?${params}`);
+    if (!res.ok) throw new Error(`Error: ${res.status}`);
+    plans.push(...await res.json());
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return plans;
+}
+
 export default function Home() {
   const [plans, setPlans] = useState<Plan[]>([]);
   const [loading, setLoading] = useState(true);
@@ -41,11 +56,7 @@ export default function Home() {
   const [focusTaskId, setFocusTaskId] = useState<string | undefined>(undefined);
 
   useEffect(() => {
-    fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans`)
-      .then(async res => {
-        if (!res.ok) throw new Error(`Error: ${res.status}`);
-        return res.json();
-      })
+    fetchAllPlans()
       .then(data => { setPlans(data); setLoading(false); })
       .catch(err => { console.error("Failed to fetch plans:", err); setPlans([]); setLoading(false); });
   }, [selectedPlanId, viewPlanId, showCreateModal, showManageModal]);
@@ -86,9 +97,7 @@ export default function Home() {
 
   const handleDeletePlan = async (id: string) => {
     await fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans/${id}`, { method: 'DELETE' });
-    const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans`);
-    const data = await res.json();
-    setPlans(data);
+    setPlans(await fetchAllPlans());
   };
 
   const allChunks: Chunk[] = plans.flatMap(p => p.chunks.map(c => ({ ...c, plan_id: p.id, plan_color: p.color, plan_title: p.title })));
@@ -205,7 +214,7 @@ export default function Home() {
             // Actually the effect runs on viewPlanId change, but here ID is same.
             // Let's rely on effect re-running if we simple invoke a re-fetch or use a refresh flag.
             // For now, simpler:
-            fetch(`${process.env.NEXT_PUBLIC_API_URL || ''}/plans`).then(r => r.json()).then(setPlans);
+            fetchAllPlans().then(setPlans);
           }}
         />
       )}
@@ -25,4 +25,14 @@ export interface Plan {
     created_at: string;
     deadline?: string;
     chunks: Chunk[];
+    version?: number; // bumped on every write, backs the ETag
+    // Aggregates maintained by the backend on every chunk write
+    chunk_count?: number;
+    todo_count?: number;
+    in_progress_count?: number;
+    done_count?: number;
+    skipped_count?: number;
+    deferred_count?: number;
+    total_hours?: number;
+    completed_hours?: number;
 }
@@ -1,6 +1,14 @@
-
-import sqlite3
+import sys
 import os
+from sqlalchemy import create_engine
+
+# Superseded by the versioned migrations in backend/app/migrations.py
+# (the baseline migration adds the history column to older databases).
+# Kept so existing instructions still work.
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from app.migrations import run_migrations
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '../backend/planout_v2.db')
 
@@ -9,27 +17,12 @@ def migrate():
         print(f"Database not found at {DB_PATH}")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     try:
-        # Check if column exists
-        cursor.execute("PRAGMA table_info(chunk)")
-        columns = [info[1] for info in cursor.fetchall()]
-        
-        if 'history' not in columns:
-            print("Adding 'history' column to 'chunk' table...")
-            # SQLite stores JSON as TEXT
-            cursor.execute("ALTER TABLE chunk ADD COLUMN history TEXT")
-            conn.commit()
-            print("Migration successful.")
-        else:
-            print("'history' column already exists.")
-            
+        applied = run_migrations(create_engine(f"sqlite:///{DB_PATH}"))
+        if not applied:
+            print("Schema is up to date.")
     except Exception as e:
         print(f"Error during migration: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     migrate()
@@ -1,83 +1,176 @@
-
 import sys
 import os
-from datetime import datetime, timedelta
-from sqlmodel import Session, select, func
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import bindparam, select, text, update
+
+# Fills in missing chunk deadlines, then plan deadlines.
+# Chunks are streamed in id order (keyset pagination on the primary key) and
+# written back in batches of --batch-size, each in its own short transaction,
+# so the write lock is only held per batch. After every batch the last id is
+# saved to a checkpoint file: an interrupted run picks up where it stopped.
+# --workers N splits the id space into N key ranges handled by separate
+# processes (SQLite still serializes their writes; busy_timeout makes them
+# take turns). Plan deadlines are updated at the end in one set-based UPDATE.
+#
+# Usage: python scripts/backfill_deadlines.py [--batch-size 5000] [--workers 1]
+#                                             [--checkpoint PATH] [--restart]
 
 # Add backend to path to import app modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
 
-from app.database import engine
-from app.models import Plan, Chunk
+from app.database import engine as default_engine
+from app.models import Chunk
+from app.deadlines import compute_deadlines
 
-def calculate_deadline(chunk: Chunk):
-    if not chunk.estimated_hours or chunk.estimated_hours <= 0:
-        return None
-    
-    if not chunk.duration_minutes or chunk.duration_minutes <= 0:
+chunk_table = Chunk.__table__
+
+KeyRange = Tuple[Optional[str], Optional[str]]
+
+def key_ranges(workers: int) -> List[KeyRange]:
+    """
+    Splits chunk ids (uuid4 strings) into contiguous ranges by leading hex
+    digit. The first and last ranges are open-ended so every id is covered.
+    """
+    digits = "0123456789abcdef"
+    workers = max(1, min(workers, len(digits)))
+    bounds = [digits[round(i * len(digits) / workers)] for i in range(1, workers)]
+    lows = [None] + bounds
+    highs = bounds + [None]
+    return list(zip(lows, highs))
+
+def load_checkpoint(path: str, key_range: KeyRange) -> Optional[str]:
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
         return None
+    if tuple(state.get("range", ())) != tuple(key_range):
+        return None  # written for a different split; the deadline IS NULL filter makes redoing safe
+    return state.get("last_id")
+
+def save_checkpoint(path: str, key_range: KeyRange, last_id: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"range": list(key_range), "last_id": last_id}, f)
+    os.replace(tmp, path)
+
+def compute_batch(rows, now: datetime) -> List[Dict[str, object]]:
+    """Deadline updates for a batch of (id, plan_id, hours, minutes, frequency, scheduled_date) rows."""
+    deadlines, valid = compute_deadlines(
+        [row.estimated_hours or 0 for row in rows],
+        [row.duration_minutes or 0 for row in rows],
+        [row.frequency for row in rows],
+        # Default to now if not scheduled
+        np.array([row.scheduled_date or now for row in rows], dtype="datetime64[us]"),
+    )
+    return [
+        {"b_id": row.id, "b_deadline": deadline.astype(datetime)}
+        for row, deadline, ok in zip(rows, deadlines, valid) if ok
+    ]
 
-    # Default to now if not scheduled
-    start_date = chunk.scheduled_date or datetime.now()
-    
-    session_hours = chunk.duration_minutes / 60.0
-    sessions_needed = chunk.estimated_hours / session_hours
-    
-    multiplier = 1
-    freq = (chunk.frequency or "Once").lower()
-    if freq == 'weekly':
-        multiplier = 7
-    elif freq == 'monthly':
-        multiplier = 30
-    
-    total_days = int(sessions_needed * multiplier)
-    
-    # Calculate end date
-    end_date = start_date + timedelta(days=total_days)
-    return end_date
+def backfill_range(key_range: KeyRange, batch_size: int, checkpoint: Optional[str], restart: bool = False, engine=None) -> Tuple[int, int]:
+    """Backfills chunk deadlines for one key range; returns (scanned, updated)."""
+    engine = engine or default_engine
+    low, high = key_range
+    last_id = None if restart or not checkpoint else load_checkpoint(checkpoint, key_range)
+    now = datetime.now()
+    scanned = updated = 0
+
+    write_chunks = (
+        update(chunk_table)
+        .where(chunk_table.c.id == bindparam("b_id"))
+        .values(deadline=bindparam("b_deadline"))
+    )
+    while True:
+        query = select(
+            chunk_table.c.id, chunk_table.c.plan_id, chunk_table.c.estimated_hours,
+            chunk_table.c.duration_minutes, chunk_table.c.frequency, chunk_table.c.scheduled_date,
+        ).where(chunk_table.c.deadline.is_(None)).order_by(chunk_table.c.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(chunk_table.c.id > last_id)
+        elif low is not None:
+            query = query.where(chunk_table.c.id >= low)
+        if high is not None:
+            query = query.where(chunk_table.c.id < high)
+
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            break
+
+        changes = compute_batch(rows, now)
+        if changes:
+            updated_ids = {change["b_id"] for change in changes}
+            plan_ids = sorted({row.plan_id for row in rows if row.id in updated_ids and row.plan_id})
+            with engine.begin() as conn:
+                conn.execute(write_chunks, changes)
+                # Clients revalidate plans through their version-based ETags
+                conn.execute(
+                    text('UPDATE "plan" SET version = version + 1 WHERE id IN :ids').bindparams(bindparam("ids", expanding=True)),
+                    {"ids": plan_ids},
+                )
+        last_id = rows[-1].id
+        if checkpoint:
+            save_checkpoint(checkpoint, key_range, last_id)
+        scanned += len(rows)
+        updated += len(changes)
+        print(f"  [{low or '-'}..{high or '-'}] {scanned} scanned, {updated} updated (at {last_id})")
+    return scanned, updated
+
+def update_plan_deadlines(engine=None) -> int:
+    """
+    One set-based pass: a plan's deadline becomes its latest chunk deadline
+    when it has none or an earlier one. Uses ix_chunk_plan_id_deadline.
+    """
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE "plan" SET
+                deadline = (SELECT max(deadline) FROM chunk WHERE chunk.plan_id = "plan".id),
+                version = version + 1
+            WHERE (SELECT max(deadline) FROM chunk WHERE chunk.plan_id = "plan".id)
+                  > coalesce(deadline, '')
+        """))
+        return result.rowcount
+
+def _run_range(args) -> Tuple[int, int]:
+    key_range, batch_size, checkpoint, restart = args
+    return backfill_range(key_range, batch_size, checkpoint, restart)
 
 def main():
-    with Session(engine) as session:
-        plans = session.exec(select(Plan)).all()
-        print(f"Found {len(plans)} plans.")
-        
-        for plan in plans:
-            print(f"Processing Plan: {plan.title}")
-            chunks = session.exec(select(Chunk).where(Chunk.plan_id == plan.id)).all()
-            
-            max_chunk_deadline = None
-            
-            for chunk in chunks:
-                if not chunk.deadline:
-                    new_deadline = calculate_deadline(chunk)
-                    if new_deadline:
-                        chunk.deadline = new_deadline
-                        session.add(chunk)
-                        print(f"  - Updated Task '{chunk.title}' deadline to {new_deadline.date()}")
-                    else:
-                        print(f"  - Skipped Task '{chunk.title}' (insufficient data)")
-                
-                # Track max deadline for plan
-                # Use the new one or existing one
-                current_deadline = chunk.deadline
-                if current_deadline:
-                    if not max_chunk_deadline or current_deadline > max_chunk_deadline:
-                        max_chunk_deadline = current_deadline
-
-            # Update Plan
-            if max_chunk_deadline:
-                # If plan deadline is missing or earlier than max_chunk, update it?
-                # User said "calculate and populate".
-                # I'll update it if it's missing or if we want to sync it.
-                # "populate" implies filling missing ones.
-                # But logical consistency suggests syncing.
-                if not plan.deadline or max_chunk_deadline > plan.deadline:
-                     plan.deadline = max_chunk_deadline
-                     session.add(plan)
-                     print(f"  > Updated Plan Deadline to {max_chunk_deadline.date()}")
-            
-        session.commit()
-        print("Backfill complete.")
+    parser = argparse.ArgumentParser(description="Backfill missing chunk and plan deadlines.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1, help="processes, each taking a range of chunk ids")
+    parser.add_argument("--checkpoint", default=os.path.join(os.path.dirname(__file__), ".backfill_deadlines.checkpoint"))
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ranges = key_ranges(args.workers)
+    jobs = [
+        (key_range, args.batch_size, f"{args.checkpoint}.{index}", args.restart)
+        for index, key_range in enumerate(ranges)
+    ]
+    if len(jobs) == 1:
+        results = [_run_range(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            results = list(pool.map(_run_range, jobs))
+
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    plans = update_plan_deadlines()
+    for _, _, checkpoint, _ in jobs:
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+    print(f"Backfill complete: {updated} of {scanned} chunks updated, {plans} plan deadlines updated "
+          f"in {time.perf_counter() - started:.1f}s.")
 
 if __name__ == "__main__":
     main()
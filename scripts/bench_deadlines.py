@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+# Compares the per-chunk Python deadline loop with the vectorized engine on
+# synthetic chunks.
+# Usage: python scripts/bench_deadlines.py [chunks]
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from app.deadlines import FREQUENCY_DAYS, compute_deadlines, frequency_codes
+
+def python_loop(hours, minutes, frequencies, starts):
+    # The old one-chunk-at-a-time formula
+    out = []
+    for h, m, f, start in zip(hours, minutes, frequencies, starts):
+        if h <= 0 or m <= 0:
+            out.append(None)
+            continue
+        sessions_needed = h / (m / 60.0)
+        out.append(start + timedelta(days=int(sessions_needed * FREQUENCY_DAYS[f])))
+    return out
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    hours = rng.uniform(0, 100, n).round(1)
+    minutes = rng.choice([15, 30, 45, 60, 90, 120], n)
+    names = np.array(list(FREQUENCY_DAYS))[rng.integers(0, 4, n)]
+    starts = np.datetime64("2030-01-01") + rng.integers(0, 365, n).astype("timedelta64[D]")
+
+    py_hours, py_minutes, py_names = hours.tolist(), minutes.tolist(), names.tolist()
+    py_starts = starts.astype("datetime64[us]").astype(datetime).tolist()
+
+    t = time.perf_counter()
+    expected = python_loop(py_hours, py_minutes, py_names, py_starts)
+    loop_time = time.perf_counter() - t
+
+    t = time.perf_counter()
+    codes = frequency_codes(py_names)
+    codes_time = time.perf_counter() - t
+
+    t = time.perf_counter()
+    deadlines, valid = compute_deadlines(hours, minutes, codes, starts)
+    engine_time = time.perf_counter() - t
+
+    sample = rng.integers(0, n, 1000)
+    for i in sample:
+        assert (deadlines[i].astype(datetime) if valid[i] else None) == expected[i]
+
+    print(f"{n:,} chunks")
+    print(f"  python loop            {loop_time * 1000:9.1f} ms")
+    print(f"  engine (codes given)   {engine_time * 1000:9.1f} ms  ({loop_time / engine_time:.0f}x)")
+    print(f"  frequency name -> code {codes_time * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
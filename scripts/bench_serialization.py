@@ -0,0 +1,61 @@
+import sys
+import os
+import json
+import timeit
+from datetime import datetime, timedelta
+
+# Compares the default response_model path with the fast serializer for one
+# plan with many chunks.
+# Usage: python scripts/bench_serialization.py [chunks] [repeats]
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from fastapi.encoders import jsonable_encoder
+from app.models import Plan, Chunk, ChunkStatus, PlanRead
+from app.serializers import serialize_plan, orjson
+
+def build_plan(n_chunks: int) -> Plan:
+    start = datetime(2030, 1, 1)
+    plan = Plan(title="Benchmark", description="Synthetic plan", created_at=start, chunk_count=n_chunks)
+    statuses = list(ChunkStatus)
+    for i in range(n_chunks):
+        plan.chunks.append(Chunk(
+            title=f"Task {i}",
+            description="Do the thing",
+            status=statuses[i % len(statuses)],
+            estimated_hours=float(i % 20 + 1),
+            duration_minutes=30,
+            frequency=["Once", "Daily", "Weekly", "Monthly"][i % 4],
+            scheduled_date=start + timedelta(days=i),
+            deadline=start + timedelta(days=i + 30),
+            history={"skipped": [f"2030-02-{d:02d}" for d in range(1, i % 5 + 2)], "deferred": {"2030-03-01": "2030-03-02"}},
+            plan_id=plan.id,
+        ))
+    return plan
+
+def response_model_path(plan: Plan) -> bytes:
+    # What FastAPI does for response_model=PlanRead: validate, encode, dump
+    content = jsonable_encoder(PlanRead.model_validate(plan))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def main():
+    n_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    plan = build_plan(n_chunks)
+
+    assert json.loads(response_model_path(plan)) == json.loads(serialize_plan(plan, fast=True))
+
+    print(f"Plan with {n_chunks} chunks, best of 5 x {repeats} runs (encoder: {'orjson' if orjson else 'json'})")
+    results = {}
+    for name, fn in [
+        ("response_model", response_model_path),
+        ("pydantic dump_json", lambda p: serialize_plan(p, fast=False)),
+        ("fast", lambda p: serialize_plan(p, fast=True)),
+    ]:
+        best = min(timeit.repeat(lambda: fn(plan), number=repeats, repeat=5)) / repeats
+        results[name] = best
+        print(f"  {name:<20} {best * 1000:8.3f} ms/request")
+    print(f"  speedup vs response_model: {results['response_model'] / results['fast']:.1f}x")
+
+if __name__ == "__main__":
+    main()